@@ -1,12 +1,161 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request
 from flask_cors import CORS
+from compression import ResponseCompressor
 from data_fetcher import OpenF1Client
+from delta import InvalidCursor, race_data_cursor, race_data_delta
+from history import HistoryStore
+from json_provider import FastJSONProvider, PreEncoded
+from poller import LivePoller
 from datetime import datetime
+import os
+import threading
 
 app = Flask(__name__)
-CORS(app)
+app.json = FastJSONProvider(app)
+CORS(app, expose_headers=['X-Total-Count'])
 
-client = OpenF1Client()
+client = OpenF1Client(
+    archive_dir=os.environ.get('PITWALL_ARCHIVE_DIR', 'archive'),
+    max_workers=int(os.environ.get('PITWALL_MAX_WORKERS', 16)),
+    pool_maxsize=int(os.environ.get('PITWALL_POOL_SIZE', 32)),
+    columnar_laps=os.environ.get('PITWALL_COLUMNAR_LAPS', '0') == '1',
+    warehouse_path=os.environ.get('PITWALL_WAREHOUSE'),
+    dataset_dir=os.environ.get('PITWALL_DATASET_DIR', 'datasets')
+)
+poller = LivePoller(client)
+compressor = ResponseCompressor()
+# Filled by the history.py batch job
+history = HistoryStore(os.environ.get('PITWALL_HISTORY_DB', 'history.db'))
+
+# Background polling of the live session, started with the first request
+LIVE_POLLER_ENABLED = os.environ.get('PITWALL_LIVE_POLLER', '1') == '1'
+
+# Seconds between keepalive comments on idle event streams
+STREAM_KEEPALIVE = 15
+
+# Largest limit for /api/fastest-laps - live sessions only keep this many on their board
+FASTEST_LAPS_MAX = 100
+
+# Cache-Control by how mutable the data behind a route is
+FINISHED_SESSION_CACHE_CONTROL = 'public, max-age=86400, immutable'
+SCHEDULE_CACHE_CONTROL = 'public, max-age=300'
+LIVE_CACHE_CONTROL = 'no-cache'
+
+# Encoded sections of live snapshots, reused until the poller replaces the section.
+# Request threads share it, so it is only touched under encoded_sections_lock
+encoded_sections = {}
+encoded_sections_lock = threading.Lock()
+
+def pre_encode_sections(session_key, data, normalized):
+    """Encode each snapshot section once and share the bytes across requests"""
+    with encoded_sections_lock:
+        for key in [k for k in encoded_sections if k[0] not in poller.snapshots]:
+            del encoded_sections[key]
+        cached_sections = {section: encoded_sections.get((session_key, normalized, section)) for section in data}
+
+    encoded = {}
+    fresh = {}
+    for section, value in data.items():
+        cached = cached_sections[section]
+        if cached is None or cached[0] is not value:
+            cached = fresh[(session_key, normalized, section)] = (value, PreEncoded(app.json.encode(value)))
+        encoded[section] = cached[1]
+
+    if fresh:
+        with encoded_sections_lock:
+            encoded_sections.update(fresh)
+    return encoded
+
+def live_or_fetch(session_key, section, fetch):
+    """Serve a section from the live snapshot when the poller is tracking the session"""
+    data = poller.get(session_key, section)
+    return data if data is not None else fetch()
+
+def cache_control_for(endpoint, view_args, body):
+    """Pick Cache-Control for an API response from the mutability of its data"""
+    if endpoint == 'get_stats':
+        return 'no-store'
+    if endpoint in ('get_meetings', 'get_sessions'):
+        return SCHEDULE_CACHE_CONTROL
+    session_key = (view_args or {}).get('session_key')
+    # An empty body or a failed upstream request may just be an outage - never pin that for a day
+    if (session_key is not None and body not in (b'[]', b'{}') and client.is_session_finished(session_key)
+            and not client.had_fetch_error(session_key)):
+        return FINISHED_SESSION_CACHE_CONTROL
+    # Anything else may change - clients must revalidate, which is cheap with an ETag
+    return LIVE_CACHE_CONTROL
+
+@app.before_request
+def start_live_poller():
+    """Start the poller in whichever process serves requests - python app.py, flask run or a WSGI server.
+
+    Starting on the first request rather than at import keeps the debug reloader's
+    watcher process, which never serves, from polling too. Set PITWALL_LIVE_POLLER=0 to disable.
+    """
+    if LIVE_POLLER_ENABLED:
+        poller.start()
+
+@app.after_request
+def add_cache_headers(response):
+    """Add ETag and Cache-Control to API responses, answer If-None-Match with 304 and compress"""
+    if (not request.path.startswith('/api/') or request.method != 'GET'
+            or response.status_code != 200 or response.is_streamed):
+        return response
+
+    if 'Cache-Control' not in response.headers:
+        response.headers['Cache-Control'] = cache_control_for(request.endpoint, request.view_args,
+                                                                  response.get_data())
+    if not response.get_etag()[0]:
+        response.add_etag()
+    response = response.make_conditional(request)
+
+    # Compressed bytes of immutable responses are reused across viewers
+    cacheable = response.headers['Cache-Control'] == FINISHED_SESSION_CACHE_CONTROL
+    return compressor.compress_response(response, request.accept_encodings, cacheable)
+
+def requested_fields():
+    """Field names from ?fields=a,b,c, or None for every field"""
+    fields = request.args.get('fields')
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(',') if field.strip()]
+
+def wants_driver_info():
+    fields = requested_fields()
+    return fields is None or 'driver_info' in fields
+
+def lap_number_in_range(row, lap_from, lap_to):
+    lap = row.get('lap_number')
+    return lap is not None and lap_from <= lap <= lap_to
+
+def stint_overlaps_range(row, lap_from, lap_to):
+    lap_start = row.get('lap_start') or 0
+    lap_end = row.get('lap_end') or float('inf')
+    return lap_start <= lap_to and lap_end >= lap_from
+
+def rows_response(rows, lap_filter=None):
+    """Apply lap_from/lap_to, offset/limit and fields= from the query string before serializing"""
+    lap_from = request.args.get('lap_from', type=int)
+    lap_to = request.args.get('lap_to', type=int)
+    if lap_filter and (lap_from is not None or lap_to is not None):
+        low = lap_from if lap_from is not None else float('-inf')
+        high = lap_to if lap_to is not None else float('inf')
+        rows = [row for row in rows if lap_filter(row, low, high)]
+
+    total = len(rows)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = request.args.get('limit', type=int)
+    if offset or limit is not None:
+        end = offset + max(limit, 0) if limit is not None else None
+        rows = rows[offset:end]
+
+    fields = requested_fields()
+    if fields:
+        rows = [{field: row[field] for field in fields if field in row} for row in rows]
+
+    response = jsonify(rows)
+    response.headers['X-Total-Count'] = str(total)
+    return response
 
 @app.route('/')
 def index():
@@ -15,7 +164,7 @@ def index():
 @app.route('/api/current-session')
 def get_current_session():
     """Get current or most recent F1 session"""
-    session = client.get_current_session()
+    session = poller.current_session or client.get_current_session()
     return jsonify(session if session else {})
 
 @app.route('/api/meetings')
@@ -33,58 +182,198 @@ def get_sessions(meeting_key):
 
 @app.route('/api/race-data/<int:session_key>')
 def get_race_data(session_key):
-    """Get comprehensive race data"""
-    data = client.get_comprehensive_race_data(session_key)
-    return jsonify(data)
+    """Get comprehensive race data.
+
+    ?format=normalized sends drivers once instead of per row, and ?since=<cursor>
+    returns only rows newer than a cursor from an earlier response.
+    """
+    normalized = request.args.get('format') == 'normalized'
+    since = request.args.get('since')
+    live = poller.get_race_data(session_key, normalized)
+    data = live if live is not None else client.get_comprehensive_race_data(session_key, normalized=normalized)
+
+    if since:
+        try:
+            return jsonify(race_data_delta(data, since))
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+
+    if live is not None:
+        return jsonify({**pre_encode_sections(session_key, live, normalized), 'cursor': race_data_cursor(live)})
+    return jsonify({**data, 'cursor': race_data_cursor(data)})
 
 @app.route('/api/positions/<int:session_key>')
 def get_positions(session_key):
     """Get latest driver positions"""
-    positions = client.get_latest_positions(session_key)
+    positions = live_or_fetch(session_key, 'positions', lambda: client.get_latest_positions(session_key))
     return jsonify(positions)
 
 @app.route('/api/pit-stops/<int:session_key>')
 def get_pit_stops(session_key):
     """Get all pit stops"""
-    pit_stops = client.get_pit_stops(session_key)
-    return jsonify(pit_stops)
+    pit_stops = live_or_fetch(session_key, 'pit_stops',
+                              lambda: client.get_pit_stops(session_key, wants_driver_info()))
+    return rows_response(pit_stops, lap_number_in_range)
 
 @app.route('/api/race-control/<int:session_key>')
 def get_race_control(session_key):
     """Get race control messages"""
-    messages = client.get_race_control_messages(session_key)
+    messages = live_or_fetch(session_key, 'race_control', lambda: client.get_race_control_messages(session_key))
     return jsonify(messages)
 
 @app.route('/api/team-radio/<int:session_key>')
 def get_team_radio(session_key):
     """Get team radio messages"""
-    radio = client.get_team_radio(session_key)
-    return jsonify(radio)
+    radio = live_or_fetch(session_key, 'team_radio',
+                          lambda: client.get_team_radio(session_key, wants_driver_info()))
+    # Radio rows have no lap number, so only paging and projection apply
+    return rows_response(radio)
 
 @app.route('/api/weather/<int:session_key>')
 def get_weather(session_key):
     """Get weather data"""
-    weather = client.get_weather(session_key)
+    weather = live_or_fetch(session_key, 'weather', lambda: client.get_weather(session_key))
     return jsonify(weather)
 
 @app.route('/api/intervals/<int:session_key>')
 def get_intervals(session_key):
     """Get time intervals between drivers"""
-    intervals = client.get_intervals(session_key)
+    intervals = live_or_fetch(session_key, 'intervals', lambda: client.get_intervals(session_key))
     return jsonify(intervals)
 
 @app.route('/api/stints/<int:session_key>')
 def get_stints(session_key):
     """Get tire stint information"""
-    stints = client.get_stints(session_key)
-    return jsonify(stints)
+    stints = live_or_fetch(session_key, 'stints',
+                           lambda: client.get_stints(session_key, wants_driver_info()))
+    return rows_response(stints, stint_overlaps_range)
 
 @app.route('/api/laps/<int:session_key>')
 def get_laps(session_key):
-    """Get lap times"""
+    """Get lap times; supports fields=, lap_from/lap_to and limit/offset"""
     driver_number = request.args.get('driver_number', type=int)
-    laps = client.get_lap_data(session_key, driver_number)
-    return jsonify(laps)
+    laps = poller.get(session_key, 'all_laps')
+    if laps is None and client.columnar_laps:
+        # The lap columns answer the driver and lap range filters without scanning row dicts
+        laps = client.select_laps(session_key, driver_number, request.args.get('lap_from', type=int),
+                                  request.args.get('lap_to', type=int), with_driver_info=wants_driver_info())
+        return rows_response(laps)
+    if laps is None:
+        laps = client.get_lap_data(session_key, driver_number, with_driver_info=wants_driver_info())
+    elif driver_number:
+        laps = [lap for lap in laps if lap.get('driver_number') == driver_number]
+    return rows_response(laps, lap_number_in_range)
+
+@app.route('/api/fastest-laps/<int:session_key>')
+def get_fastest_laps(session_key):
+    """Get the fastest laps (limit=, at most FASTEST_LAPS_MAX) or, with per_driver=1, each driver's best"""
+    if request.args.get('per_driver') == '1':
+        laps = poller.personal_bests(session_key)
+        return jsonify(laps if laps is not None else client.get_personal_bests(session_key))
+
+    limit = min(max(request.args.get('limit', 10, type=int), 0), FASTEST_LAPS_MAX)
+    laps = poller.fastest_laps(session_key, limit)
+    return jsonify(laps if laps is not None else client.get_fastest_laps(session_key, limit))
+
+@app.route('/api/lap-summary/<int:session_key>')
+def get_lap_summary(session_key):
+    """Get lap count, best and average lap time per driver"""
+    return jsonify(client.get_lap_summary(session_key))
+
+@app.route('/api/standings/<int:year>')
+def get_standings(year):
+    """Get driver and constructor championship standings for a season"""
+    return jsonify(client.calculate_championship_standings(year))
+
+@app.route('/api/seasons/<int:year>/pit-stops')
+def get_season_pit_stops(year):
+    """Get every pit stop of a season from the local warehouse (PITWALL_WAREHOUSE)"""
+    return rows_response(client.get_season_pit_stops(year), lap_number_in_range)
+
+@app.route('/api/drivers/<int:driver_number>/fastest-laps')
+def get_driver_fastest_laps(driver_number):
+    """Get a driver's fastest laps across sessions from the local warehouse (year=, limit=)"""
+    year = request.args.get('year', type=int)
+    limit = min(max(request.args.get('limit', 10, type=int), 0), FASTEST_LAPS_MAX)
+    return jsonify(client.get_driver_fastest_laps(driver_number, year, limit))
+
+@app.route('/api/history/standings')
+def get_history_standings():
+    """Get standings over a range of collected seasons (from=, to=)"""
+    # Don't create an empty database in the working directory before the batch job has run
+    years = history.years() if history.exists() else []
+    if not years:
+        return jsonify({'error': 'No seasons collected - run history.py first'}), 404
+    year_from = request.args.get('from', years[0], type=int)
+    year_to = request.args.get('to', years[-1], type=int)
+    return jsonify(history.standings(year_from, year_to))
+
+@app.route('/api/stream/<int:session_key>')
+def stream_race_data(session_key):
+    """Stream new positions, intervals, pit stops, race control, radio and laps as Server-Sent Events.
+
+    Session info, stints, weather and fastest laps are sent whole whenever they change.
+    """
+    log = poller.watch(session_key)
+    last_id = request.headers.get('Last-Event-ID', type=int)
+
+    def sse(event_id, event_type, data):
+        return f"id: {event_id}\nevent: {event_type}\ndata: {app.json.dumps(data)}\n\n"
+
+    def snapshot(event_id):
+        data = (poller.get_race_data(session_key, normalized=True)
+                or client.get_comprehensive_race_data(session_key, normalized=True))
+        return sse(event_id, 'snapshot', data)
+
+    def generate():
+        if log is None:
+            # Finished session - nothing will follow the snapshot
+            yield snapshot(0)
+            yield sse(0, 'end', {'session_key': session_key})
+            return
+
+        cursor = last_id
+        events = log.since(cursor) if cursor is not None else None
+        if events is None:
+            # New subscriber, or resume point no longer buffered
+            cursor = log.last_id
+            yield snapshot(cursor)
+        else:
+            for event_id, event_type, data in events:
+                cursor = event_id
+                yield sse(event_id, event_type, data)
+
+        while not log.closed:
+            events = log.wait(cursor, timeout=STREAM_KEEPALIVE)
+            if events is None:
+                cursor = log.last_id
+                yield snapshot(cursor)
+                continue
+            if not events:
+                yield ': keepalive\n\n'
+            for event_id, event_type, data in events:
+                cursor = event_id
+                yield sse(event_id, event_type, data)
+
+        yield sse(cursor, 'end', {'session_key': session_key})
+
+    def stream():
+        try:
+            yield from generate()
+        finally:
+            # Runs when the client disconnects too, so the session stops being polled for it
+            if log is not None:
+                poller.unwatch(session_key)
+
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/api/stats')
+def get_stats():
+    """Get client cache and upstream traffic counters"""
+    return jsonify({**client.get_stats(), 'poller': poller.stats(), 'compression': compressor.stats()})
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5001)
@@ -0,0 +1,71 @@
+import contextlib
+import gzip
+import json
+import os
+import tempfile
+from typing import Dict, List, Optional
+
+
+class SessionArchive:
+    """Immutable on-disk store of responses for completed sessions.
+
+    Layout is one gzip-compressed JSON file per session and request:
+    <root>/<session_key>/<endpoint>[__<param>=<value>...].json.gz
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.hits = 0
+        self.writes = 0
+
+    @staticmethod
+    def accepts(params: Optional[Dict]) -> bool:
+        """Only plain equality filters scoped to a single session are archived"""
+        if not params or 'session_key' not in params:
+            return False
+        return all(str(k).isidentifier() for k in params)
+
+    def _path(self, endpoint: str, params: Dict) -> str:
+        extra = sorted((str(k), str(v)) for k, v in params.items() if k != 'session_key')
+        name = endpoint + ''.join(f"__{k}={v}" for k, v in extra)
+        return os.path.join(self.root, str(params['session_key']), f"{name}.json.gz")
+
+    def load(self, endpoint: str, params: Optional[Dict]) -> Optional[List[Dict]]:
+        """Return the archived response, or None if this request was never archived"""
+        if not self.accepts(params):
+            return None
+        path = self._path(endpoint, params)
+        if not os.path.exists(path):
+            return None
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading archive {path}: {e}")
+            return None
+        self.hits += 1
+        return data
+
+    def save(self, endpoint: str, params: Dict, data: List[Dict]) -> None:
+        """Write a response atomically so readers never see a partial file"""
+        path = self._path(endpoint, params)
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        except OSError as e:
+            print(f"Error writing archive {path}: {e}")
+            return
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.open(raw, 'wt', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp_path, path)
+            self.writes += 1
+        except (OSError, TypeError, ValueError) as e:
+            # e.g. a full disk or a row that isn't JSON serializable - don't leave the temp file behind
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            print(f"Error writing archive {path}: {e}")
+
+    def stats(self) -> Dict:
+        return {'root': self.root, 'hits': self.hits, 'writes': self.writes}
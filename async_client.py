@@ -0,0 +1,388 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from archive import SessionArchive
+from cache import TTLCache
+from data_fetcher import OpenF1Client, session_has_ended, session_has_started
+from lap_store import LapColumns
+from leaderboard import FastestLapBoard
+
+
+class AsyncOpenF1Client:
+    """asyncio counterpart of OpenF1Client with the same session-data methods.
+
+    Uses one pooled keep-alive httpx.AsyncClient and a semaphore that bounds
+    concurrent upstream requests. Caching, archiving and data shaping follow
+    the same rules as the synchronous client. The warehouse, exported datasets
+    and the incremental standings engine are only available on OpenF1Client,
+    so the cross-session queries built on them have no async version.
+    """
+
+    BASE_URL = OpenF1Client.BASE_URL
+    CACHE_TTLS = OpenF1Client.CACHE_TTLS
+    DEFAULT_CACHE_TTL = OpenF1Client.DEFAULT_CACHE_TTL
+    ARCHIVE_CACHE_TTL = OpenF1Client.ARCHIVE_CACHE_TTL
+    ARCHIVE_SETTLE_TIME = OpenF1Client.ARCHIVE_SETTLE_TIME
+    FETCH_ERROR_WINDOW = OpenF1Client.FETCH_ERROR_WINDOW
+    LIVE_FEED_IDLE_TIME = OpenF1Client.LIVE_FEED_IDLE_TIME
+
+    def __init__(self, max_connections: int = 20, max_concurrency: int = 10,
+                 cache_max_bytes: int = 64 * 1024 * 1024, archive_dir: Optional[str] = None,
+                 columnar_laps: bool = False):
+        self.http = httpx.AsyncClient(
+            base_url=self.BASE_URL,
+            timeout=10,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.drivers_cache = {}
+        self.driver_index_cache = {}
+        self.response_cache = TTLCache(max_bytes=cache_max_bytes)
+        self.archive = SessionArchive(archive_dir) if archive_dir else None
+        self.finished_sessions = set()
+        self.live_feeds = {}
+        self._live_feed_locks = {}
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+        self.coalesced = 0
+        self.fetch_errors = {}
+        self.columnar_laps = columnar_laps
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
+
+    async def _get(self, endpoint: str, params: Optional[Dict] = None) -> List[Dict]:
+        """Make GET request to OpenF1 API"""
+        key = OpenF1Client._cache_key(endpoint, params)
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            return list(cached)
+
+        if self.archive:
+            archived = self.archive.load(endpoint, params)
+            if archived is not None:
+                self.response_cache.set(key, archived, self.ARCHIVE_CACHE_TTL, len(str(archived)))
+                return list(archived)
+
+        # Concurrent callers for the same request share one upstream call. It runs as its own
+        # task so that cancelling any caller, including the first, doesn't strand the others
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(self._fetch(endpoint, params, key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        data = await asyncio.shield(task)
+        return list(data) if isinstance(data, list) else data
+
+    async def _fetch(self, endpoint: str, params: Optional[Dict], key: Tuple) -> List[Dict]:
+        try:
+            async with self.semaphore:
+                response = await self.http.get(f"/{endpoint}", params=params)
+            response.raise_for_status()
+            data = response.json()
+        except httpx.HTTPError as e:
+            print(f"Error fetching {endpoint}: {e}")
+            self._record_fetch_error(params)
+            return []
+
+        if not isinstance(data, list):
+            return data
+
+        ttl = self.CACHE_TTLS.get(endpoint, self.DEFAULT_CACHE_TTL)
+        self.response_cache.set(key, data, ttl, len(response.content))
+        await self._archive_if_finished(endpoint, params, data)
+        return data
+
+    def _record_fetch_error(self, params: Optional[Dict]) -> None:
+        session_key = (params or {}).get('session_key')
+        if session_key is not None:
+            self.fetch_errors[session_key] = time.monotonic()
+
+    def had_fetch_error(self, session_key: int) -> bool:
+        """Whether an upstream request for the session failed recently, so responses may be incomplete"""
+        failed_at = self.fetch_errors.get(session_key)
+        return failed_at is not None and time.monotonic() - failed_at < self.FETCH_ERROR_WINDOW
+
+    async def _archive_if_finished(self, endpoint: str, params: Optional[Dict], data: List[Dict]) -> None:
+        if not self.archive or not data or not self.archive.accepts(params):
+            return
+
+        if endpoint == 'sessions' and set(params) == {'session_key'}:
+            finished = self._mark_if_finished(data[0])
+        else:
+            finished = await self.is_session_finished(params['session_key'])
+
+        if finished:
+            # File IO off the event loop
+            await asyncio.to_thread(self.archive.save, endpoint, params, data)
+
+    def _mark_if_finished(self, session: Dict) -> bool:
+        if session_has_ended(session, self.ARCHIVE_SETTLE_TIME):
+            self.finished_sessions.add(session.get('session_key'))
+            return True
+        return False
+
+    async def is_session_finished(self, session_key: int) -> bool:
+        """Check whether a session has ended and its data is final"""
+        if session_key in self.finished_sessions:
+            return True
+        info = await self.get_session_info(session_key)
+        return bool(info) and self._mark_if_finished(info)
+
+    async def _get_incremental(self, endpoint: str, session_key: int) -> List[Dict]:
+        """Get a date-ordered feed, downloading only rows newer than the last one seen"""
+        params = {"session_key": session_key}
+        feed_key = (endpoint, session_key)
+
+        self._evict_idle_feeds()
+        if await self.is_session_finished(session_key):
+            self._drop_live_feed(feed_key)
+            return await self._get(endpoint, params=params)
+
+        # Unknown sessions and ones that haven't started get no feed
+        if feed_key not in self.live_feeds and not session_has_started(await self.get_session_info(session_key)):
+            return await self._get(endpoint, params=params)
+
+        lock = self._live_feed_locks.setdefault(feed_key, asyncio.Lock())
+        async with lock:
+            feed = self.live_feeds.get(feed_key)
+            if feed is None or not feed['watermark']:
+                feed = {'rows': [], 'watermark': '', 'boundary': set()}
+                OpenF1Client._merge_feed(feed, await self._get(endpoint, params=params))
+                self.live_feeds[feed_key] = feed
+            else:
+                new_rows = await self._get(endpoint, params={**params, "date>": feed['watermark']})
+                OpenF1Client._merge_feed(feed, new_rows)
+            feed['read_at'] = time.monotonic()
+            return list(feed['rows'])
+
+    def _drop_live_feed(self, feed_key: Tuple) -> None:
+        self.live_feeds.pop(feed_key, None)
+        self._live_feed_locks.pop(feed_key, None)
+
+    def _evict_idle_feeds(self) -> None:
+        """Drop incremental feeds nobody has read for LIVE_FEED_IDLE_TIME"""
+        cutoff = time.monotonic() - self.LIVE_FEED_IDLE_TIME
+        for feed_key, feed in list(self.live_feeds.items()):
+            if feed.get('read_at', cutoff) < cutoff:
+                self._drop_live_feed(feed_key)
+
+    def get_stats(self) -> Dict:
+        """Runtime counters for the client"""
+        stats = {
+            'cache': self.response_cache.stats(),
+            'upstream': {'coalesced': self.coalesced, 'in_flight': len(self._inflight)}
+        }
+        if self.archive:
+            stats['archive'] = self.archive.stats()
+        return stats
+
+    async def _recent_sessions(self) -> List[Dict]:
+        """Sessions starting from a day ago, including those scheduled later"""
+        since = (datetime.utcnow() - timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+        return await self._get("sessions", params={"date_start>=": since.isoformat()})
+
+    async def get_current_session(self) -> Optional[Dict]:
+        """Get the current or most recent session"""
+        sessions = await self._recent_sessions()
+        if sessions:
+            sessions.sort(key=lambda x: x.get('date_start', ''), reverse=True)
+            return sessions[0]
+        return None
+
+    async def get_live_session(self) -> Optional[Dict]:
+        """Get the session running now, or still within the settle time after its end"""
+        live = [s for s in await self._recent_sessions()
+                if session_has_started(s) and not session_has_ended(s, self.ARCHIVE_SETTLE_TIME)]
+        return max(live, key=lambda x: x.get('date_start', '')) if live else None
+
+    async def get_session_info(self, session_key: int) -> Dict:
+        """Get detailed session information"""
+        sessions = await self._get("sessions", params={"session_key": session_key})
+        return sessions[0] if sessions else {}
+
+    async def get_drivers(self, session_key: int) -> List[Dict]:
+        """Get all drivers in a session with enhanced info"""
+        if session_key in self.drivers_cache:
+            return self.drivers_cache[session_key]
+
+        drivers = OpenF1Client._add_team_colors(await self._get("drivers", params={"session_key": session_key}))
+        if drivers:
+            self.drivers_cache[session_key] = drivers
+        return drivers
+
+    async def get_driver_index(self, session_key: int) -> Dict[int, Dict]:
+        """Get a driver_number -> driver lookup for a session"""
+        index = self.driver_index_cache.get(session_key)
+        if index is None:
+            index = OpenF1Client._index_drivers(await self.get_drivers(session_key))
+            if index:
+                self.driver_index_cache[session_key] = index
+        return index
+
+    async def get_driver_info(self, session_key: int, driver_number: int) -> Optional[Dict]:
+        """Get specific driver information"""
+        return (await self.get_driver_index(session_key)).get(driver_number)
+
+    async def get_position_data(self, session_key: int) -> List[Dict]:
+        """Get position data for all drivers"""
+        return await self._get_incremental("position", session_key)
+
+    async def get_latest_positions(self, session_key: int, with_driver_info: bool = True) -> List[Dict]:
+        """Get the most recent position for each driver with driver info"""
+        latest = OpenF1Client._latest_per_driver(await self.get_position_data(session_key))
+        if not latest:
+            return []
+        return OpenF1Client._attach_driver_info(latest, await self.get_driver_index(session_key)) if with_driver_info else latest
+
+    async def _get_with_drivers(self, endpoint: str, params: Dict, with_driver_info: bool = True) -> List[Dict]:
+        if not with_driver_info:
+            return await self._get(endpoint, params=params)
+        rows, drivers = await asyncio.gather(self._get(endpoint, params=params), self.get_driver_index(params['session_key']))
+        return OpenF1Client._attach_driver_info(rows, drivers) if rows else rows
+
+    async def get_lap_data(self, session_key: int, driver_number: Optional[int] = None,
+                           with_driver_info: bool = True) -> List[Dict]:
+        """Get lap times data"""
+        params = {"session_key": session_key}
+        if driver_number:
+            params["driver_number"] = driver_number
+        return await self._get_with_drivers("laps", params, with_driver_info)
+
+    async def get_fastest_laps(self, session_key: int, limit: int = 10) -> List[Dict]:
+        """Get fastest laps in the session"""
+        if self.columnar_laps:
+            columns, drivers = await asyncio.gather(self.get_lap_columns(session_key), self.get_driver_index(session_key))
+            return OpenF1Client._attach_driver_info(columns.rows(columns.fastest(limit)), drivers)
+        return OpenF1Client._select_fastest_laps(await self.get_lap_data(session_key), limit)
+
+    async def select_laps(self, session_key: int, driver_number: Optional[int] = None, lap_from: Optional[int] = None,
+                          lap_to: Optional[int] = None, with_driver_info: bool = True) -> List[Dict]:
+        """Get laps of a driver and lap-number range, selected from the session's lap columns"""
+        columns = await self.get_lap_columns(session_key)
+        laps = columns.rows(columns.select(driver_number, lap_from, lap_to))
+        if laps and with_driver_info:
+            laps = OpenF1Client._attach_driver_info(laps, await self.get_driver_index(session_key))
+        return laps
+
+    async def get_lap_columns(self, session_key: int) -> LapColumns:
+        """Get a session's laps in columnar form, cached alongside responses and rebuilt when the entry expires"""
+        key = ('lap_columns', session_key)
+        columns = self.response_cache.get(key)
+        if columns is not None:
+            return columns
+
+        columns = LapColumns(await self._get("laps", params={"session_key": session_key}))
+        ttl = self.ARCHIVE_CACHE_TTL if await self.is_session_finished(session_key) else self.CACHE_TTLS['laps']
+        self.response_cache.set(key, columns, ttl, columns.nbytes())
+        return columns
+
+    async def get_lap_summary(self, session_key: int) -> List[Dict]:
+        """Get lap count, best and average lap time per driver, best first"""
+        columns, drivers = await asyncio.gather(self.get_lap_columns(session_key), self.get_driver_index(session_key))
+        rows = [{'driver_number': driver, **stats} for driver, stats in columns.driver_summary().items()]
+        rows.sort(key=lambda x: x['best'])
+        return OpenF1Client._attach_driver_info(rows, drivers)
+
+    async def get_personal_bests(self, session_key: int) -> List[Dict]:
+        """Get each driver's fastest lap, quickest first"""
+        board = FastestLapBoard()
+        board.update(await self.get_lap_data(session_key))
+        return board.personal_bests()
+
+    async def get_pit_stops(self, session_key: int, with_driver_info: bool = True) -> List[Dict]:
+        """Get all pit stops in the session with driver info"""
+        return await self._get_with_drivers("pit", {"session_key": session_key}, with_driver_info)
+
+    async def get_race_control_messages(self, session_key: int) -> List[Dict]:
+        """Get race control messages (flags, penalties, etc.)"""
+        return await self._get_incremental("race_control", session_key)
+
+    async def get_team_radio(self, session_key: int, with_driver_info: bool = True) -> List[Dict]:
+        """Get team radio messages with driver info"""
+        return await self._get_with_drivers("team_radio", {"session_key": session_key}, with_driver_info)
+
+    async def get_weather(self, session_key: int) -> List[Dict]:
+        """Get weather data"""
+        return await self._get("weather", params={"session_key": session_key})
+
+    async def get_car_data(self, session_key: int, driver_number: int) -> List[Dict]:
+        """Get car telemetry data for a specific driver"""
+        return await self._get("car_data", params={"session_key": session_key, "driver_number": driver_number})
+
+    async def get_intervals(self, session_key: int) -> List[Dict]:
+        """Get time intervals between drivers"""
+        return await self._get_incremental("intervals", session_key)
+
+    async def get_stints(self, session_key: int, with_driver_info: bool = True) -> List[Dict]:
+        """Get tire stint information with driver info"""
+        return await self._get_with_drivers("stints", {"session_key": session_key}, with_driver_info)
+
+    async def get_meetings(self, year: Optional[int] = None) -> List[Dict]:
+        """Get race weekend meetings (Grand Prix events)"""
+        return await self._get("meetings", params={"year": year or datetime.utcnow().year})
+
+    async def get_sessions_for_meeting(self, meeting_key: int) -> List[Dict]:
+        """Get all sessions for a specific meeting (FP1, FP2, Quali, Race, etc.)"""
+        return await self._get("sessions", params={"meeting_key": meeting_key})
+
+    async def get_lap_by_lap_data(self, session_key: int) -> Dict:
+        """Get comprehensive lap-by-lap data for replay"""
+        laps, positions = await asyncio.gather(self.get_lap_data(session_key), self.get_position_data(session_key))
+        return OpenF1Client._organize_lap_by_lap(laps, positions)
+
+    async def _race_result(self, meeting_key: int) -> Optional[Tuple[List[Dict], List[Dict]]]:
+        sessions = await self.get_sessions_for_meeting(meeting_key)
+        race_session = next((s for s in sessions if s.get('session_name') == 'Race'), None)
+        # A race that hasn't started has nothing to classify yet
+        if not race_session or not session_has_started(race_session):
+            return None
+        session_key = race_session['session_key']
+        return await asyncio.gather(self.get_latest_positions(session_key), self.get_drivers(session_key))
+
+    async def calculate_championship_standings(self, year: int) -> Dict:
+        """Calculate championship standings from race results"""
+        meetings = await self.get_meetings(year)
+        results = await asyncio.gather(*(self._race_result(m['meeting_key']) for m in meetings))
+        return OpenF1Client._standings_from_races([r for r in results if r])
+
+    async def get_comprehensive_race_data(self, session_key: int, normalized: bool = False) -> Dict:
+        """Get all data for a race session, fetching every raw dataset once and concurrently.
+
+        With normalized=True rows reference drivers by driver_number instead of embedding driver_info.
+        """
+        with_info = not normalized
+        tasks = {
+            "session_info": self.get_session_info(session_key),
+            "drivers": self.get_drivers(session_key),
+            "position": self.get_position_data(session_key),
+            "pit_stops": self.get_pit_stops(session_key, with_info),
+            "race_control": self.get_race_control_messages(session_key),
+            "team_radio": self.get_team_radio(session_key, with_info),
+            "weather": self.get_weather(session_key),
+            "intervals": self.get_intervals(session_key),
+            "stints": self.get_stints(session_key, with_info),
+            "all_laps": self.get_lap_data(session_key, with_driver_info=with_info)
+        }
+
+        outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raw = {}
+        for key, outcome in zip(tasks, outcomes):
+            if isinstance(outcome, Exception):
+                print(f"Error fetching {key}: {outcome}")
+                self._record_fetch_error({"session_key": session_key})
+                raw[key] = [] if key != "session_info" else {}
+            else:
+                raw[key] = outcome
+        return OpenF1Client._derive_race_views(raw, normalized)
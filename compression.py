@@ -0,0 +1,62 @@
+import gzip
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # brotli is optional - fall back to gzip only
+    brotli = None
+
+from cache import TTLCache
+
+
+class ResponseCompressor:
+    """gzip/brotli negotiation with a cache of compressed bodies for immutable responses"""
+
+    # Bodies smaller than this aren't worth compressing
+    MIN_SIZE = 1024
+    # Immutable bodies are cached by ETag, so entries only age out under memory pressure
+    CACHE_TTL = 24 * 3600
+
+    def __init__(self, cache_max_bytes: int = 32 * 1024 * 1024, gzip_level: int = 6, brotli_quality: int = 5):
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache = TTLCache(max_bytes=cache_max_bytes)
+        self.encodings = ['br', 'gzip'] if brotli else ['gzip']
+
+    def _compress(self, data: bytes, encoding: str) -> bytes:
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.gzip_level)
+
+    def choose_encoding(self, accept_encodings) -> Optional[str]:
+        """Pick the best supported encoding from the request's Accept-Encoding"""
+        return accept_encodings.best_match(self.encodings)
+
+    def compress_response(self, response, accept_encodings, cacheable: bool = False):
+        """Compress a response body in place; cacheable bodies are compressed once per ETag"""
+        if (response.status_code != 200 or response.is_streamed or response.direct_passthrough
+                or 'Content-Encoding' in response.headers):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = self.choose_encoding(accept_encodings)
+        if not encoding or (response.content_length or 0) < self.MIN_SIZE:
+            return response
+
+        etag, _ = response.get_etag()
+        key = (etag, encoding) if cacheable and etag else None
+        body = self.cache.get(key) if key else None
+        if body is None:
+            body = self._compress(response.get_data(), encoding)
+            if key:
+                self.cache.set(key, body, self.CACHE_TTL, len(body))
+
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        if etag:
+            # Same content, different bytes: only a weak validator still matches
+            response.set_etag(etag, weak=True)
+        return response
+
+    def stats(self):
+        return {'encodings': self.encodings, 'cache': self.cache.stats()}
@@ -1,6 +1,78 @@
+import concurrent.futures
+import heapq
 import requests
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from dateutil import parser as date_parser
+from requests.adapters import HTTPAdapter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from archive import SessionArchive
+from cache import TTLCache
+from datasets import SessionDatasets, table_columns, table_to_rows
+from lap_store import LapColumns
+from leaderboard import FastestLapBoard
+from reducers import LatestPerDriver, Reducer, iter_response_rows, reduce_rows
+from singleflight import SingleFlight
+from standings import SeasonTally, StandingsEngine, race_contribution
+from warehouse import Warehouse
+
+
+def session_has_started(session: Dict) -> bool:
+    """Check whether a session's date_start has passed"""
+    date_start = session.get('date_start')
+    if not date_start:
+        return False
+    try:
+        start = date_parser.isoparse(date_start)
+    except ValueError:
+        return False
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    return start <= datetime.now(timezone.utc)
+
+
+def session_has_ended(session: Dict, settle_time: timedelta) -> bool:
+    """Check whether a session's date_end is more than settle_time in the past"""
+    date_end = session.get('date_end')
+    if not date_end:
+        return False
+    try:
+        end = date_parser.isoparse(date_end)
+    except ValueError:
+        return False
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    return end + settle_time < datetime.now(timezone.utc)
+
+
+# Race-data sections whose rows carry a driver_number
+DRIVER_ROW_SECTIONS = ('positions', 'pit_stops', 'team_radio', 'stints', 'fastest_laps', 'all_laps')
+# Version flag for race data with a drivers table instead of per-row driver_info
+NORMALIZED_FORMAT_VERSION = 2
+
+
+def normalize_race_data(data: Dict, previous: Optional[Tuple[Dict, Dict]] = None) -> Dict:
+    """Convert race data to the normalized format by dropping per-row driver_info.
+    
+    previous is an earlier (source, normalized) pair; sections whose rows are the
+    same list object as in that source are reused instead of being converted again.
+    """
+    if data.get('format_version') == NORMALIZED_FORMAT_VERSION:
+        return data
+    prev_source, prev_result = previous or ({}, {})
+    result = dict(data)
+    for section in DRIVER_ROW_SECTIONS:
+        rows = data.get(section)
+        if rows and rows is prev_source.get(section):
+            result[section] = prev_result[section]
+        elif rows:
+            result[section] = [{k: v for k, v in row.items() if k != 'driver_info'} for row in rows]
+    result['format_version'] = NORMALIZED_FORMAT_VERSION
+    return result
+
 
 class OpenF1Client:
     BASE_URL = "https://api.openf1.org/v1" ##open API
@@ -22,32 +94,387 @@ class OpenF1Client:
         'racing bulls': '#6692FF'
     }
     
-    def __init__(self):
+    # Seconds a response stays fresh, per endpoint
+    CACHE_TTLS = {
+        'meetings': 3600,
+        'drivers': 3600,
+        'sessions': 60,
+        'laps': 10,
+        'stints': 15,
+        'pit': 10,
+        'team_radio': 10,
+        'race_control': 5,
+        'weather': 30,
+        'car_data': 5,
+        'position': 3,
+        'intervals': 3
+    }
+    DEFAULT_CACHE_TTL = 5
+    # Archived responses never change, so keep them in memory longer
+    ARCHIVE_CACHE_TTL = 3600
+    # Grace period after date_end before a session's data is treated as final
+    ARCHIVE_SETTLE_TIME = timedelta(hours=1)
+    # Seconds after a failed upstream request during which a session's responses aren't marked immutable
+    FETCH_ERROR_WINDOW = 60
+    # Seconds an incremental feed is kept after its last read
+    LIVE_FEED_IDLE_TIME = 300
+    
+    def __init__(self, cache_max_bytes: int = 64 * 1024 * 1024, archive_dir: Optional[str] = None,
+                 max_workers: int = 16, pool_maxsize: int = 32, columnar_laps: bool = False,
+                 warehouse_path: Optional[str] = None, dataset_dir: Optional[str] = None):
         self.session = requests.Session()
+        # Size the connection pool so parallel fetches don't contend for sockets
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        # Long-lived pool shared by every parallel fetch
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='openf1')
+        self.max_workers = max_workers
+        self.pool_maxsize = pool_maxsize
+        self._executor_stats = {'tasks': 0, 'queued': 0, 'queue_wait_total': 0.0, 'queue_wait_max': 0.0}
+        self._executor_stats_lock = threading.Lock()
         self.drivers_cache = {}
+        self.driver_index_cache = {}
+        self.response_cache = TTLCache(max_bytes=cache_max_bytes)
+        self.archive = SessionArchive(archive_dir) if archive_dir else None
+        self.warehouse = Warehouse(warehouse_path) if warehouse_path else None
+        # Sessions exported with datasets.py are read from their memory-mapped files
+        self.datasets = SessionDatasets(dataset_dir) if dataset_dir and SessionDatasets.available() else None
+        self.finished_sessions = set()
+        self.live_feeds = {}
+        self._live_feed_locks = {}
+        self._live_feeds_lock = threading.Lock()
+        self.inflight = SingleFlight()
+        self.fetch_errors = {}
+        # Optionally answer lap analytics from typed columns instead of row dicts
+        self.columnar_laps = columnar_laps
+        self.standings = StandingsEngine(self)
+    
+    @staticmethod
+    def _cache_key(endpoint: str, params: Optional[Dict]) -> Tuple:
+        """Build a cache key that ignores param ordering and value types"""
+        items = tuple(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+        return (endpoint, items)
     
     def _get(self, endpoint: str, params: Optional[Dict] = None) -> List[Dict]:
         """Make GET request to OpenF1 API"""
+        key = self._cache_key(endpoint, params)
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            return list(cached)
+        
+        if self.datasets:
+            table = self.datasets.query(endpoint, params)
+            if table is not None:
+                exported = table_to_rows(table)
+                self.response_cache.set(key, exported, self.ARCHIVE_CACHE_TTL, table.nbytes)
+                return list(exported)
+        
+        if self.archive:
+            archived = self.archive.load(endpoint, params)
+            if archived is not None:
+                self.response_cache.set(key, archived, self.ARCHIVE_CACHE_TTL, len(str(archived)))
+                self._store_in_warehouse(endpoint, params, archived)
+                return list(archived)
+        
+        # Finished sessions can be answered from the warehouse if the same request was stored before
+        if self.warehouse and params and params.get('session_key') in self.finished_sessions:
+            stored = self._load_from_warehouse(endpoint, params)
+            if stored:
+                self.response_cache.set(key, stored, self.ARCHIVE_CACHE_TTL, len(str(stored)))
+                return list(stored)
+        
+        # Concurrent callers for the same request share one upstream call
+        data = self.inflight.do(key, lambda: self._fetch(endpoint, params, key))
+        return list(data) if isinstance(data, list) else data
+    
+    def _fetch(self, endpoint: str, params: Optional[Dict], key: Tuple) -> List[Dict]:
+        """Request from OpenF1 and store the result in the cache and archive"""
         try:
             url = f"{self.BASE_URL}/{endpoint}"
             response = self.session.get(url, params=params, timeout=10)
             response.raise_for_status()
-            return response.json()
+            data = response.json()
         except requests.exceptions.RequestException as e:
             print(f"Error fetching {endpoint}: {e}")
+            self._record_fetch_error(params)
+            return []
+        
+        if not isinstance(data, list):
+            return data
+        
+        ttl = self.CACHE_TTLS.get(endpoint, self.DEFAULT_CACHE_TTL)
+        self.response_cache.set(key, data, ttl, len(response.content))
+        self._archive_if_finished(endpoint, params, data)
+        self._store_in_warehouse(endpoint, params, data)
+        return data
+    
+    def _record_fetch_error(self, params: Optional[Dict]) -> None:
+        session_key = (params or {}).get('session_key')
+        if session_key is not None:
+            self.fetch_errors[session_key] = time.monotonic()
+    
+    def had_fetch_error(self, session_key: int) -> bool:
+        """Whether an upstream request for the session failed recently, so responses may be incomplete"""
+        failed_at = self.fetch_errors.get(session_key)
+        return failed_at is not None and time.monotonic() - failed_at < self.FETCH_ERROR_WINDOW
+    
+    def _store_in_warehouse(self, endpoint: str, params: Optional[Dict], data: List[Dict]) -> None:
+        if not self.warehouse or not isinstance(data, list):
+            return
+        # Rows fetched while the session was live are stored, but never replayed as the full response
+        session_key = (params or {}).get('session_key')
+        replayable = session_key is not None and self.is_session_finished(session_key)
+        try:
+            self.warehouse.store(endpoint, params, data, replayable)
+        except sqlite3.Error as e:
+            print(f"Error writing {endpoint} to warehouse: {e}")
+    
+    def _load_from_warehouse(self, endpoint: str, params: Dict) -> Optional[List[Dict]]:
+        try:
+            return self.warehouse.load(endpoint, params)
+        except sqlite3.Error as e:
+            print(f"Error reading {endpoint} from warehouse: {e}")
+            return None
+    
+    def get_season_pit_stops(self, year: int) -> List[Dict]:
+        """Get every pit stop stored in the warehouse for a season"""
+        if not self.warehouse:
             return []
+        return self.warehouse.season_rows("pit", year)
+    
+    def get_driver_fastest_laps(self, driver_number: int, year: Optional[int] = None, limit: int = 10) -> List[Dict]:
+        """Get a driver's fastest laps stored in the warehouse across sessions"""
+        if not self.warehouse:
+            return []
+        return self.warehouse.fastest_laps(driver_number, year, limit)
+    
+    def _get_reduced(self, endpoint: str, params: Dict, reducer: Reducer):
+        """Reduce a response row by row, streaming it from OpenF1 unless it is already held locally.
+        
+        Only the reduced result is cached and archived, under a key derived from the reducer.
+        """
+        derived = f"{endpoint}.{reducer.name}"
+        key = self._cache_key(derived, params)
+        cached = self.response_cache.get(key)
+        if cached is None:
+            full = self.response_cache.get(self._cache_key(endpoint, params))
+            if full is not None:
+                return reduce_rows(full, reducer)
+            if self.archive:
+                cached = self.archive.load(derived, params)
+            if cached is None:
+                # A full response exported or archived earlier beats going to the network
+                full = self._load_local(endpoint, params)
+                if full is not None:
+                    cached = reduce_rows(full, reducer)
+            if cached is not None:
+                self.response_cache.set(key, cached, self.ARCHIVE_CACHE_TTL, len(str(cached)))
+        if cached is None:
+            cached = self.inflight.do(key, lambda: self._fetch_reduced(endpoint, params, reducer, key))
+        return list(cached) if isinstance(cached, list) else cached
+    
+    def _load_local(self, endpoint: str, params: Dict) -> Optional[List[Dict]]:
+        """A full response from an exported dataset or the archive, or None if neither has it"""
+        if self.datasets:
+            rows = self.datasets.load(endpoint, params)
+            if rows is not None:
+                return rows
+        return self.archive.load(endpoint, params) if self.archive else None
+    
+    def _fetch_reduced(self, endpoint: str, params: Dict, reducer: Reducer, key: Tuple):
+        """Stream a response from OpenF1 through a reducer without materializing its rows"""
+        try:
+            url = f"{self.BASE_URL}/{endpoint}"
+            with self.session.get(url, params=params, timeout=10, stream=True) as response:
+                response.raise_for_status()
+                result = reduce_rows(iter_response_rows(response), reducer)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Error fetching {endpoint}: {e}")
+            self._record_fetch_error(params)
+            return None
+        
+        ttl = self.CACHE_TTLS.get(endpoint, self.DEFAULT_CACHE_TTL)
+        self.response_cache.set(key, result, ttl, len(str(result)))
+        self._archive_if_finished(f"{endpoint}.{reducer.name}", params, result)
+        return result
+    
+    def _archive_if_finished(self, endpoint: str, params: Optional[Dict], data: List[Dict]) -> None:
+        """Persist a response once its session can no longer change"""
+        if not self.archive or not data or not self.archive.accepts(params):
+            return
+        
+        session_key = params['session_key']
+        if endpoint == 'sessions' and set(params) == {'session_key'}:
+            # Decide from the response itself to avoid recursing into get_session_info
+            finished = self._mark_if_finished(data[0])
+        else:
+            finished = self.is_session_finished(session_key)
+        
+        if finished:
+            self.archive.save(endpoint, params, data)
+    
+    def _mark_if_finished(self, session: Dict) -> bool:
+        """Record the session as finished if its date_end is safely in the past"""
+        if session_has_ended(session, self.ARCHIVE_SETTLE_TIME):
+            self.finished_sessions.add(session.get('session_key'))
+            return True
+        return False
+    
+    def is_session_finished(self, session_key: int) -> bool:
+        """Check whether a session has ended and its data is final"""
+        if session_key in self.finished_sessions:
+            return True
+        info = self.get_session_info(session_key)
+        return bool(info) and self._mark_if_finished(info)
+    
+    def _get_incremental(self, endpoint: str, session_key: int) -> List[Dict]:
+        """Get a date-ordered feed, downloading only rows newer than the last one seen"""
+        params = {"session_key": session_key}
+        feed_key = (endpoint, session_key)
+        
+        self._evict_idle_feeds()
+        if self.is_session_finished(session_key):
+            # Nothing new will arrive - serve the full (archived) response instead
+            self._drop_live_feed(feed_key)
+            return self._get(endpoint, params=params)
+        
+        # Unknown sessions and ones that haven't started get no feed
+        if feed_key not in self.live_feeds and not session_has_started(self.get_session_info(session_key)):
+            return self._get(endpoint, params=params)
+        
+        with self._live_feeds_lock:
+            lock = self._live_feed_locks.setdefault(feed_key, threading.Lock())
+        
+        with lock:
+            feed = self.live_feeds.get(feed_key)
+            if feed is None or not feed['watermark']:
+                feed = {'rows': [], 'watermark': '', 'boundary': set()}
+                self._merge_feed(feed, self._get(endpoint, params=params))
+                self.live_feeds[feed_key] = feed
+            else:
+                new_rows = self._get(endpoint, params={**params, "date>": feed['watermark']})
+                self._merge_feed(feed, new_rows)
+            feed['read_at'] = time.monotonic()
+            return list(feed['rows'])
+    
+    def _drop_live_feed(self, feed_key: Tuple) -> None:
+        with self._live_feeds_lock:
+            self.live_feeds.pop(feed_key, None)
+            self._live_feed_locks.pop(feed_key, None)
+    
+    def _evict_idle_feeds(self) -> None:
+        """Drop incremental feeds nobody has read for LIVE_FEED_IDLE_TIME"""
+        cutoff = time.monotonic() - self.LIVE_FEED_IDLE_TIME
+        for feed_key, feed in list(self.live_feeds.items()):
+            if feed.get('read_at', cutoff) < cutoff:
+                self._drop_live_feed(feed_key)
+    
+    @staticmethod
+    def _merge_feed(feed: Dict, rows: List[Dict]) -> None:
+        """Append rows newer than the feed watermark, skipping ones already seen at it"""
+        rows = sorted(rows, key=lambda x: x.get('date') or '')
+        for row in rows:
+            date = row.get('date') or ''
+            if date < feed['watermark']:
+                continue
+            
+            identity = tuple(sorted((k, repr(v)) for k, v in row.items()))
+            if date == feed['watermark']:
+                # The upstream filter is inclusive, so rows at the watermark can repeat
+                if identity in feed['boundary']:
+                    continue
+                feed['boundary'].add(identity)
+            else:
+                feed['watermark'] = date
+                feed['boundary'] = {identity}
+            
+            feed['rows'].append(row)
+    
+    def submit(self, fn: Callable, *args) -> concurrent.futures.Future:
+        """Run fn on the client's executor, recording how long it waited for a worker"""
+        submitted = time.monotonic()
+        
+        def run():
+            wait = time.monotonic() - submitted
+            with self._executor_stats_lock:
+                self._executor_stats['tasks'] += 1
+                self._executor_stats['queued'] -= 1
+                self._executor_stats['queue_wait_total'] += wait
+                self._executor_stats['queue_wait_max'] = max(self._executor_stats['queue_wait_max'], wait)
+            return fn(*args)
+        
+        with self._executor_stats_lock:
+            self._executor_stats['queued'] += 1
+        try:
+            return self.executor.submit(run)
+        except RuntimeError:
+            # The executor was shut down, so run() will never take the task off the queue
+            with self._executor_stats_lock:
+                self._executor_stats['queued'] -= 1
+            raise
+    
+    def close(self) -> None:
+        """Stop the executor and release pooled connections"""
+        self.executor.shutdown(wait=False)
+        self.session.close()
+    
+    def _executor_snapshot(self) -> Dict:
+        with self._executor_stats_lock:
+            tasks = self._executor_stats['tasks']
+            queued = self._executor_stats['queued']
+            total = self._executor_stats['queue_wait_total']
+            worst = self._executor_stats['queue_wait_max']
+        return {
+            'max_workers': self.max_workers,
+            'pool_maxsize': self.pool_maxsize,
+            'queued': queued,
+            'tasks': tasks,
+            'avg_queue_wait_ms': round(total / tasks * 1000, 3) if tasks else 0.0,
+            'max_queue_wait_ms': round(worst * 1000, 3)
+        }
+    
+    def get_stats(self) -> Dict:
+        """Runtime counters for the client"""
+        stats = {
+            'cache': self.response_cache.stats(),
+            'upstream': self.inflight.stats(),
+            'executor': self._executor_snapshot(),
+            'live_feeds': {f"{endpoint}:{session_key}": len(feed['rows'])
+                           for (endpoint, session_key), feed in list(self.live_feeds.items())},
+            'standings': self.standings.stats()
+        }
+        if self.archive:
+            stats['archive'] = self.archive.stats()
+        if self.warehouse:
+            stats['warehouse'] = self.warehouse.stats()
+        if self.datasets:
+            stats['datasets'] = self.datasets.stats()
+        return stats
+    
+    def _recent_sessions(self) -> List[Dict]:
+        """Sessions starting from a day ago, including those scheduled later"""
+        # Truncate to the hour so repeated calls share a cache entry
+        since = (datetime.utcnow() - timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+        return self._get("sessions", params={
+            "date_start>=" : since.isoformat()
+        })
     
     def get_current_session(self) -> Optional[Dict]:
         """Get the current or most recent session"""
-        sessions = self._get("sessions", params={
-            "date_start>=" : (datetime.utcnow() - timedelta(days=1)).isoformat()
-        })
+        sessions = self._recent_sessions()
         if sessions:
             # Sort by date and get most recent
             sessions.sort(key=lambda x: x.get('date_start', ''), reverse=True)
             return sessions[0]
         return None
     
+    def get_live_session(self) -> Optional[Dict]:
+        """Get the session running now, or still within the settle time after its end"""
+        live = [s for s in self._recent_sessions()
+                if session_has_started(s) and not session_has_ended(s, self.ARCHIVE_SETTLE_TIME)]
+        return max(live, key=lambda x: x.get('date_start', '')) if live else None
+    
     def get_session_info(self, session_key: int) -> Dict:
         """Get detailed session information"""
         sessions = self._get("sessions", params={"session_key": session_key})
@@ -58,58 +485,68 @@ class OpenF1Client:
         if session_key in self.drivers_cache:
             return self.drivers_cache[session_key]
         
-        drivers = self._get("drivers", params={"session_key": session_key})
-        
-        # Add team colors
+        drivers = self._add_team_colors(self._get("drivers", params={"session_key": session_key}))
+        # Don't pin an empty list from a failed or premature request
+        if drivers:
+            self.drivers_cache[session_key] = drivers
+        return drivers
+    
+    def get_driver_index(self, session_key: int) -> Dict[int, Dict]:
+        """Get a driver_number -> driver lookup for a session"""
+        index = self.driver_index_cache.get(session_key)
+        if index is None:
+            index = self._index_drivers(self.get_drivers(session_key))
+            if index:
+                self.driver_index_cache[session_key] = index
+        return index
+    
+    @staticmethod
+    def _index_drivers(drivers: List[Dict]) -> Dict[int, Dict]:
+        return {d.get('driver_number'): d for d in drivers}
+    
+    @classmethod
+    def _add_team_colors(cls, drivers: List[Dict]) -> List[Dict]:
         for driver in drivers:
             team_name = driver.get('team_name', '').lower()
-            driver['team_color'] = self.TEAM_COLORS.get(team_name, '#FFFFFF')
-        
-        self.drivers_cache[session_key] = drivers
+            driver['team_color'] = cls.TEAM_COLORS.get(team_name, '#FFFFFF')
         return drivers
     
+    @staticmethod
+    def _attach_driver_info(rows: List[Dict], drivers_by_number: Dict[int, Dict]) -> List[Dict]:
+        """Return copies of rows with the matching driver record (shared, not copied) as driver_info"""
+        # Copy rows so responses held in the cache and archive stay unenriched
+        result = []
+        for row in rows:
+            driver_info = drivers_by_number.get(row.get('driver_number'))
+            result.append({**row, 'driver_info': driver_info} if driver_info else row)
+        return result
+    
     def get_driver_info(self, session_key: int, driver_number: int) -> Optional[Dict]:
         """Get specific driver information"""
-        drivers = self.get_drivers(session_key)
-        for driver in drivers:
-            if driver.get('driver_number') == driver_number:
-                return driver
-        return None
+        return self.get_driver_index(session_key).get(driver_number)
     
     def get_position_data(self, session_key: int) -> List[Dict]:
         """Get position data for all drivers"""
-        return self._get("position", params={"session_key": session_key})
+        return self._get_incremental("position", session_key)
     
-    def get_latest_positions(self, session_key: int) -> List[Dict]:
+    def get_latest_positions(self, session_key: int, with_driver_info: bool = True) -> List[Dict]:
         """Get the most recent position for each driver with driver info"""
-        positions = self.get_position_data(session_key)
-        if not positions:
+        if ("position", session_key) in self.live_feeds or not self.is_session_finished(session_key):
+            # Live sessions keep the incremental feed in memory anyway
+            latest = self._latest_per_driver(self.get_position_data(session_key))
+        else:
+            latest = self._get_reduced("position", {"session_key": session_key}, LatestPerDriver())
+        if not latest:
             return []
-        
-        # Group by driver and get latest
-        driver_positions = {}
-        for pos in positions:
-            driver_num = pos.get('driver_number')
-            if driver_num:
-                if driver_num not in driver_positions:
-                    driver_positions[driver_num] = pos
-                elif pos.get('date', '') > driver_positions[driver_num].get('date', ''):
-                    driver_positions[driver_num] = pos
-        
-        # Add driver info to positions
-        drivers = self.get_drivers(session_key)
-        for pos in driver_positions.values():
-            driver_num = pos.get('driver_number')
-            driver_info = next((d for d in drivers if d.get('driver_number') == driver_num), None)
-            if driver_info:
-                pos['driver_info'] = driver_info
-        
-        # Sort by position
-        result = list(driver_positions.values())
-        result.sort(key=lambda x: x.get('position', 999))
-        return result
+        return self._attach_driver_info(latest, self.get_driver_index(session_key)) if with_driver_info else latest
     
-    def get_lap_data(self, session_key: int, driver_number: Optional[int] = None) -> List[Dict]:
+    @staticmethod
+    def _latest_per_driver(positions: List[Dict]) -> List[Dict]:
+        """Reduce a position feed to each driver's most recent row, sorted by position"""
+        return reduce_rows(positions or [], LatestPerDriver())
+    
+    def get_lap_data(self, session_key: int, driver_number: Optional[int] = None,
+                     with_driver_info: bool = True) -> List[Dict]:
         """Get lap times data"""
         params = {"session_key": session_key}
         if driver_number:
@@ -117,57 +554,85 @@ class OpenF1Client:
         laps = self._get("laps", params=params)
         
         # Add driver info
-        if laps:
-            drivers = self.get_drivers(session_key)
-            for lap in laps:
-                driver_num = lap.get('driver_number')
-                driver_info = next((d for d in drivers if d.get('driver_number') == driver_num), None)
-                if driver_info:
-                    lap['driver_info'] = driver_info
+        if laps and with_driver_info:
+            laps = self._attach_driver_info(laps, self.get_driver_index(session_key))
         
         return laps
     
     def get_fastest_laps(self, session_key: int, limit: int = 10) -> List[Dict]:
         """Get fastest laps in the session"""
-        laps = self.get_lap_data(session_key)
+        if self.columnar_laps:
+            columns = self.get_lap_columns(session_key)
+            return self._attach_driver_info(columns.rows(columns.fastest(limit)), self.get_driver_index(session_key))
+        return self._select_fastest_laps(self.get_lap_data(session_key), limit)
+    
+    def select_laps(self, session_key: int, driver_number: Optional[int] = None, lap_from: Optional[int] = None,
+                    lap_to: Optional[int] = None, with_driver_info: bool = True) -> List[Dict]:
+        """Get laps of a driver and lap-number range, selected from the session's lap columns"""
+        columns = self.get_lap_columns(session_key)
+        laps = columns.rows(columns.select(driver_number, lap_from, lap_to))
+        if laps and with_driver_info:
+            laps = self._attach_driver_info(laps, self.get_driver_index(session_key))
+        return laps
+    
+    def get_lap_columns(self, session_key: int) -> LapColumns:
+        """Get a session's laps in columnar form, cached alongside responses and rebuilt when the entry expires"""
+        key = ('lap_columns', session_key)
+        columns = self.response_cache.get(key)
+        if columns is not None:
+            return columns
+        
+        # An exported session's columns are read straight from its table, without building row dicts
+        table = self.datasets.load_table(session_key, 'laps') if self.datasets else None
+        if table is not None:
+            columns = LapColumns.from_columns(table_columns(table), table.num_rows)
+        else:
+            columns = LapColumns(self._get("laps", params={"session_key": session_key}))
+        ttl = self.ARCHIVE_CACHE_TTL if self.is_session_finished(session_key) else self.CACHE_TTLS['laps']
+        self.response_cache.set(key, columns, ttl, columns.nbytes())
+        return columns
+    
+    def get_lap_summary(self, session_key: int) -> List[Dict]:
+        """Get lap count, best and average lap time per driver, best first"""
+        summary = self.get_lap_columns(session_key).driver_summary()
+        rows = [{'driver_number': driver, **stats} for driver, stats in summary.items()]
+        rows.sort(key=lambda x: x['best'])
+        return self._attach_driver_info(rows, self.get_driver_index(session_key))
+    
+    @staticmethod
+    def _select_fastest_laps(laps: List[Dict], limit: int) -> List[Dict]:
         if not laps:
             return []
         
-        # Filter valid laps and sort by lap time
-        valid_laps = [lap for lap in laps if lap.get('lap_duration') and lap.get('lap_duration') > 0]
-        valid_laps.sort(key=lambda x: x.get('lap_duration', float('inf')))
-        
-        return valid_laps[:limit]
+        # Only the top few are needed, so select them with a bounded heap instead of sorting every lap
+        valid_laps = (lap for lap in laps if lap.get('lap_duration') and lap.get('lap_duration') > 0)
+        return heapq.nsmallest(max(limit, 0), valid_laps, key=lambda x: x['lap_duration'])
+    
+    def get_personal_bests(self, session_key: int) -> List[Dict]:
+        """Get each driver's fastest lap, quickest first"""
+        board = FastestLapBoard()
+        board.update(self.get_lap_data(session_key))
+        return board.personal_bests()
     
-    def get_pit_stops(self, session_key: int) -> List[Dict]:
+    def get_pit_stops(self, session_key: int, with_driver_info: bool = True) -> List[Dict]:
         """Get all pit stops in the session with driver info"""
         pit_stops = self._get("pit", params={"session_key": session_key})
         
-        if pit_stops:
-            drivers = self.get_drivers(session_key)
-            for stop in pit_stops:
-                driver_num = stop.get('driver_number')
-                driver_info = next((d for d in drivers if d.get('driver_number') == driver_num), None)
-                if driver_info:
-                    stop['driver_info'] = driver_info
+        if pit_stops and with_driver_info:
+            pit_stops = self._attach_driver_info(pit_stops, self.get_driver_index(session_key))
         
         return pit_stops
     
     def get_race_control_messages(self, session_key: int) -> List[Dict]:
         """Get race control messages (flags, penalties, etc.)"""
-        return self._get("race_control", params={"session_key": session_key})
+        return self._get_incremental("race_control", session_key)
     
-    def get_team_radio(self, session_key: int) -> List[Dict]:
+    def get_team_radio(self, session_key: int, with_driver_info: bool = True) -> List[Dict]:
         """Get team radio messages with driver info"""
         radio = self._get("team_radio", params={"session_key": session_key})
         
-        if radio:
-            drivers = self.get_drivers(session_key)
-            for msg in radio:
-                driver_num = msg.get('driver_number')
-                driver_info = next((d for d in drivers if d.get('driver_number') == driver_num), None)
-                if driver_info:
-                    msg['driver_info'] = driver_info
+        if radio and with_driver_info:
+            radio = self._attach_driver_info(radio, self.get_driver_index(session_key))
         
         return radio
     
@@ -184,19 +649,14 @@ class OpenF1Client:
     
     def get_intervals(self, session_key: int) -> List[Dict]:
         """Get time intervals between drivers"""
-        return self._get("intervals", params={"session_key": session_key})
+        return self._get_incremental("intervals", session_key)
     
-    def get_stints(self, session_key: int) -> List[Dict]:
+    def get_stints(self, session_key: int, with_driver_info: bool = True) -> List[Dict]:
         """Get tire stint information with driver info"""
         stints = self._get("stints", params={"session_key": session_key})
         
-        if stints:
-            drivers = self.get_drivers(session_key)
-            for stint in stints:
-                driver_num = stint.get('driver_number')
-                driver_info = next((d for d in drivers if d.get('driver_number') == driver_num), None)
-                if driver_info:
-                    stint['driver_info'] = driver_info
+        if stints and with_driver_info:
+            stints = self._attach_driver_info(stints, self.get_driver_index(session_key))
         
         return stints
     
@@ -215,9 +675,10 @@ class OpenF1Client:
     
     def get_lap_by_lap_data(self, session_key: int) -> Dict:
         """Get comprehensive lap-by-lap data for replay"""
-        laps = self.get_lap_data(session_key)
-        positions = self.get_position_data(session_key)
-        
+        return self._organize_lap_by_lap(self.get_lap_data(session_key), self.get_position_data(session_key))
+    
+    @staticmethod
+    def _organize_lap_by_lap(laps: List[Dict], positions: List[Dict]) -> Dict:
         # Organize by lap number
         lap_data = {}
         for lap in laps:
@@ -236,139 +697,59 @@ class OpenF1Client:
     
     def calculate_championship_standings(self, year: int) -> Dict:
         """Calculate championship standings from race results"""
-        meetings = self.get_meetings(year)
-        
-        driver_points = {}
-        constructor_points = {}
-        driver_podiums = {}
-        driver_wins = {}
-        
-        # F1 points system
-        points_system = {
-            1: 25, 2: 18, 3: 15, 4: 12, 5: 10,
-            6: 8, 7: 6, 8: 4, 9: 2, 10: 1
-        }
-        
-        for meeting in meetings:
-            sessions = self.get_sessions_for_meeting(meeting['meeting_key'])
-            race_session = next((s for s in sessions if s.get('session_name') == 'Race'), None)
-            
-            if not race_session:
-                continue
-            
-            session_key = race_session['session_key']
-            positions = self.get_latest_positions(session_key)
-            drivers = self.get_drivers(session_key)
-            
-            for pos in positions:
-                position = pos.get('position')
-                driver_num = pos.get('driver_number')
-                
-                if not position or not driver_num:
-                    continue
-                
-                driver_info = next((d for d in drivers if d.get('driver_number') == driver_num), None)
-                if not driver_info:
-                    continue
-                
-                driver_name = driver_info.get('full_name') or driver_info.get('name_acronym')
-                team_name = driver_info.get('team_name')
-                
-                if not driver_name:
-                    continue
-                
-                # Initialize driver
-                if driver_name not in driver_points:
-                    driver_points[driver_name] = {
-                        'points': 0,
-                        'team': team_name,
-                        'team_color': driver_info.get('team_color'),
-                        'driver_number': driver_num
-                    }
-                    driver_podiums[driver_name] = 0
-                    driver_wins[driver_name] = 0
-                
-                # Add points
-                if position in points_system:
-                    driver_points[driver_name]['points'] += points_system[position]
-                
-                # Track podiums
-                if position <= 3:
-                    driver_podiums[driver_name] += 1
-                
-                # Track wins
-                if position == 1:
-                    driver_wins[driver_name] += 1
-                
-                # Constructor points
-                if team_name:
-                    if team_name not in constructor_points:
-                        constructor_points[team_name] = {
-                            'points': 0,
-                            'team_color': driver_info.get('team_color')
-                        }
-                    if position in points_system:
-                        constructor_points[team_name]['points'] += points_system[position]
-        
-        # Sort drivers by points
-        drivers_sorted = sorted(
-            [{'name': k, **v, 'podiums': driver_podiums.get(k, 0), 'wins': driver_wins.get(k, 0)} 
-             for k, v in driver_points.items()],
-            key=lambda x: x['points'],
-            reverse=True
-        )
-        
-        # Sort constructors by points
-        constructors_sorted = sorted(
-            [{'name': k, **v} for k, v in constructor_points.items()],
-            key=lambda x: x['points'],
-            reverse=True
-        )
-        
-        # Get all podium finishers
-        podium_finishers = sorted(
-            [d for d in drivers_sorted if d['podiums'] > 0],
-            key=lambda x: x['podiums'],
-            reverse=True
-        )
-        
-        return {
-            'drivers': drivers_sorted[:10],
-            'constructors': constructors_sorted[:5],
-            'podium_finishers': podium_finishers,
-            'all_drivers': drivers_sorted
-        }
+        return self.standings.standings(year)
+    
+    @staticmethod
+    def _standings_from_races(races: List[Tuple[List[Dict], List[Dict]]]) -> Dict:
+        """Tally standings from the (latest positions, drivers) of each race"""
+        tally = SeasonTally()
+        for race, (positions, drivers) in enumerate(races):
+            tally.apply(race, race_contribution(positions, OpenF1Client._index_drivers(drivers)))
+        return tally.standings()
     
-    def get_comprehensive_race_data(self, session_key: int) -> Dict:
-        """Get all data for a race session in one call using parallel execution"""
-        import concurrent.futures
+    def get_comprehensive_race_data(self, session_key: int, normalized: bool = False) -> Dict:
+        """Get all data for a race session in one call using parallel execution.
         
-        # Define the tasks to run in parallel
+        With normalized=True rows reference drivers by driver_number instead of embedding driver_info.
+        """
+        with_info = not normalized
+        # Download each raw dataset once, in parallel
         tasks = {
             "session_info": lambda: self.get_session_info(session_key),
             "drivers": lambda: self.get_drivers(session_key),
-            "positions": lambda: self.get_latest_positions(session_key),
-            "pit_stops": lambda: self.get_pit_stops(session_key),
+            "position": lambda: self.get_position_data(session_key),
+            "pit_stops": lambda: self.get_pit_stops(session_key, with_info),
             "race_control": lambda: self.get_race_control_messages(session_key),
-            "team_radio": lambda: self.get_team_radio(session_key),
+            "team_radio": lambda: self.get_team_radio(session_key, with_info),
             "weather": lambda: self.get_weather(session_key),
             "intervals": lambda: self.get_intervals(session_key),
-            "stints": lambda: self.get_stints(session_key),
-            "fastest_laps": lambda: self.get_fastest_laps(session_key),
-            "all_laps": lambda: self.get_lap_data(session_key)
+            "stints": lambda: self.get_stints(session_key, with_info),
+            "all_laps": lambda: self.get_lap_data(session_key, with_driver_info=with_info)
         }
         
-        results = {}
-        
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            future_to_key = {executor.submit(task): key for key, task in tasks.items()}
-            
-            for future in concurrent.futures.as_completed(future_to_key):
-                key = future_to_key[future]
-                try:
-                    results[key] = future.result()
-                except Exception as e:
-                    print(f"Error fetching {key}: {e}")
-                    results[key] = [] if key != "session_info" else {}
-                    
+        # Collect in task order, not completion order, so identical data always serializes the same
+        futures = {key: self.submit(task) for key, task in tasks.items()}
+        raw = {}
+        for key, future in futures.items():
+            try:
+                raw[key] = future.result()
+            except Exception as e:
+                print(f"Error fetching {key}: {e}")
+                self._record_fetch_error({"session_key": session_key})
+                raw[key] = [] if key != "session_info" else {}
+                
+        return self._derive_race_views(raw, normalized)
+    
+    @classmethod
+    def _derive_race_views(cls, raw: Dict, normalized: bool = False) -> Dict:
+        """Compute the derived race-data sections from the raw downloads"""
+        results = {key: value for key, value in raw.items() if key != "position"}
+        # positions comes from the position feed, fastest_laps from all_laps
+        positions = cls._latest_per_driver(raw["position"]) if raw["position"] else []
+        if not normalized:
+            positions = cls._attach_driver_info(positions, cls._index_drivers(raw["drivers"]))
+        results["positions"] = positions
+        results["fastest_laps"] = cls._select_fastest_laps(raw["all_laps"], 10)
+        if normalized:
+            results["format_version"] = NORMALIZED_FORMAT_VERSION
         return results
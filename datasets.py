@@ -0,0 +1,191 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from dateutil import parser as date_parser
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional - without it sessions are never exported or loaded from files
+    pa = None
+
+# Endpoints exported for offline analysis
+EXPORT_ENDPOINTS = ('laps', 'position', 'intervals', 'stints', 'weather', 'car_data')
+# ISO date strings stored as UTC timestamps
+DATE_FIELDS = ('date', 'date_start')
+# Marks a column whose values had mixed types and were stored as JSON text
+JSON_COLUMN = b'pitwall.json'
+FORMATS = {'arrow': '.arrow', 'parquet': '.parquet'}
+
+
+def _column(name: str, values: List):
+    if name in DATE_FIELDS and all(v is None or isinstance(v, str) for v in values):
+        try:
+            return pa.array([date_parser.isoparse(v) if v else None for v in values], pa.timestamp('us', tz='UTC')), None
+        except ValueError:
+            pass
+    try:
+        return pa.array(values), None
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # e.g. gap_to_leader, which is a number or "+1 LAP"
+        return pa.array([None if v is None else json.dumps(v) for v in values], pa.string()), {JSON_COLUMN: b'1'}
+
+
+def rows_to_table(rows: List[Dict]):
+    """Typed Arrow table from API rows, with dates as timestamps"""
+    names = list(dict.fromkeys(name for row in rows for name in row))
+    arrays, fields = [], []
+    for name in names:
+        array, metadata = _column(name, [row.get(name) for row in rows])
+        arrays.append(array)
+        fields.append(pa.field(name, array.type, metadata=metadata))
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+
+def table_columns(table) -> Dict[str, List]:
+    """API-shaped values of each column of a table written by rows_to_table"""
+    columns = {}
+    for field in table.schema:
+        values = table[field.name].to_pylist()
+        if pa.types.is_timestamp(field.type):
+            values = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+        elif field.metadata and field.metadata.get(JSON_COLUMN):
+            values = [json.loads(v) if v is not None else None for v in values]
+        columns[field.name] = values
+    return columns
+
+
+def table_to_rows(table) -> List[Dict]:
+    """API-shaped rows back from a table written by rows_to_table"""
+    columns = table_columns(table)
+    return [dict(zip(columns, values)) for values in zip(*columns.values())]
+
+
+class SessionDatasets:
+    """Sessions exported as Arrow IPC or Parquet files for offline analysis.
+
+    Layout is <root>/<session_key>/<endpoint>.arrow (or .parquet). Arrow files
+    are memory-mapped, so loading a table doesn't copy its buffers.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.hits = 0
+
+    @staticmethod
+    def available() -> bool:
+        return pa is not None
+
+    def _path(self, session_key, endpoint: str, fmt: str) -> str:
+        return os.path.join(self.root, str(session_key), endpoint + FORMATS[fmt])
+
+    def find(self, session_key, endpoint: str) -> Optional[str]:
+        for fmt in FORMATS:
+            path = self._path(session_key, endpoint, fmt)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def load_table(self, session_key, endpoint: str):
+        """The exported table for a session, or None if there is none or it can't be read"""
+        path = self.find(session_key, endpoint) if pa else None
+        if not path:
+            return None
+        try:
+            if path.endswith(FORMATS['arrow']):
+                return pa.ipc.open_file(pa.memory_map(path)).read_all()
+            return pq.read_table(path, memory_map=True)
+        except (OSError, pa.ArrowInvalid) as e:
+            print(f"Error reading dataset {endpoint} for session {session_key}: {e}")
+            return None
+
+    def query(self, endpoint: str, params: Optional[Dict]):
+        """Table for a session-wide request (optionally for one driver), or None if not exported"""
+        if not params or 'session_key' not in params or not set(params) <= {'session_key', 'driver_number'}:
+            return None
+        table = self.load_table(params['session_key'], endpoint)
+        if table is None:
+            return None
+        if 'driver_number' in params and 'driver_number' in table.column_names:
+            table = table.filter(pc.equal(table['driver_number'], int(params['driver_number'])))
+        self.hits += 1
+        return table
+
+    def load(self, endpoint: str, params: Optional[Dict]) -> Optional[List[Dict]]:
+        """Rows for a session-wide request (optionally for one driver), or None if not exported"""
+        table = self.query(endpoint, params)
+        return table_to_rows(table) if table is not None else None
+
+    def save(self, session_key, endpoint: str, rows: List[Dict], fmt: str = 'arrow') -> str:
+        """Write an endpoint's rows atomically, returning the file path"""
+        path = self._path(session_key, endpoint, fmt)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        table = rows_to_table(rows)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            if fmt == 'arrow':
+                with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            else:
+                pq.write_table(table, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return path
+
+    def stats(self) -> Dict:
+        return {'root': self.root, 'hits': self.hits}
+
+
+def export_session(client, datasets: SessionDatasets, session_key: int, endpoints=EXPORT_ENDPOINTS,
+                   fmt: str = 'arrow') -> Dict[str, Tuple[int, str]]:
+    """Fetch endpoints of a session concurrently and write each one that has rows, returning (rows, path)"""
+    futures = {endpoint: client.submit(client._get, endpoint, {"session_key": session_key}) for endpoint in endpoints}
+    written = {}
+    for endpoint, future in futures.items():
+        rows = future.result()
+        if rows:
+            written[endpoint] = (len(rows), datasets.save(session_key, endpoint, rows, fmt))
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export sessions to Arrow/Parquet files for offline analysis')
+    parser.add_argument('session_keys', type=int, nargs='+')
+    parser.add_argument('--out', default=os.environ.get('PITWALL_DATASET_DIR', 'datasets'))
+    parser.add_argument('--format', choices=list(FORMATS), default='arrow')
+    parser.add_argument('--endpoints', default=','.join(EXPORT_ENDPOINTS),
+                        help='Comma-separated endpoints to export')
+    parser.add_argument('--archive-dir', default=os.environ.get('PITWALL_ARCHIVE_DIR', 'archive'))
+    args = parser.parse_args()
+    if not SessionDatasets.available():
+        parser.error('pyarrow is required to export sessions (pip install pyarrow)')
+
+    # Imported here because data_fetcher loads sessions through this module
+    from data_fetcher import OpenF1Client
+    client = OpenF1Client(archive_dir=args.archive_dir)
+    datasets = SessionDatasets(args.out)
+    endpoints = [e.strip() for e in args.endpoints.split(',') if e.strip()]
+    try:
+        for session_key in args.session_keys:
+            written = export_session(client, datasets, session_key, endpoints, args.format)
+            if not written:
+                print(f"{session_key}: no data", file=sys.stderr)
+            for endpoint, (count, path) in written.items():
+                print(f"{session_key}: {endpoint} ({count} rows) -> {path}")
+    finally:
+        client.close()
+
+
+if __name__ == '__main__':
+    main()
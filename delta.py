@@ -0,0 +1,95 @@
+import base64
+import hashlib
+import json
+from typing import Dict, List, Optional, Tuple
+
+# Sections whose new rows are found with a date watermark
+DATE_SECTIONS = ('pit_stops', 'team_radio', 'race_control', 'weather', 'intervals')
+# Small or revised sections that are always sent whole in a delta
+FULL_SECTIONS = ('drivers', 'positions', 'fastest_laps', 'stints')
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(state: Dict) -> str:
+    raw = json.dumps(state, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Dict:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        state = json.loads(raw)
+    except ValueError as e:
+        raise InvalidCursor(f"Invalid cursor: {e}")
+    if not isinstance(state, dict):
+        raise InvalidCursor("Invalid cursor")
+    return state
+
+
+def _row_digest(row: Dict) -> str:
+    # Embedded objects such as driver_info don't identify a row
+    fields = {k: v for k, v in row.items() if not isinstance(v, (dict, list))}
+    return hashlib.sha1(json.dumps(fields, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+
+def _date_watermark(rows: List[Dict]) -> List:
+    """[newest date, digests of the rows at that date], so rows arriving later with the same date are still sent"""
+    newest = max((row.get('date') or '' for row in rows), default='')
+    return [newest, [_row_digest(row) for row in rows if newest and row.get('date') == newest]]
+
+
+def _parse_watermark(value) -> Tuple[str, Optional[set]]:
+    # A bare date is a cursor from before digests were kept; rows at that date were already sent
+    if value is None or isinstance(value, str):
+        return value or '', None
+    if (isinstance(value, list) and len(value) == 2 and isinstance(value[0], str) and isinstance(value[1], list)
+            and all(isinstance(digest, str) for digest in value[1])):
+        return value[0], set(value[1])
+    raise InvalidCursor("Invalid cursor")
+
+
+def race_data_cursor(data: Dict) -> str:
+    """Opaque cursor marking the newest rows of each section in the race data"""
+    state = {section: _date_watermark(data.get(section) or []) for section in DATE_SECTIONS}
+    # Laps are tracked per driver by the last completed lap, since a lap row can appear before it has a time
+    laps = {}
+    for lap in data.get('all_laps') or []:
+        if lap.get('lap_duration'):
+            driver = str(lap.get('driver_number'))
+            laps[driver] = max(laps.get(driver, 0), lap.get('lap_number') or 0)
+    state['laps'] = laps
+    return encode_cursor(state)
+
+
+def race_data_delta(data: Dict, cursor: str) -> Dict:
+    """Race data reduced to rows newer than the cursor, plus a cursor for the next request"""
+    state = decode_cursor(cursor)
+
+    result = {'delta': True}
+    if 'format_version' in data:
+        result['format_version'] = data['format_version']
+    for section in FULL_SECTIONS:
+        result[section] = data.get(section) or []
+
+    for section in DATE_SECTIONS:
+        watermark, seen = _parse_watermark(state.get(section))
+        result[section] = [
+            row for row in data.get(section) or []
+            if (row.get('date') or '') > watermark
+            or (seen is not None and row.get('date') == watermark and _row_digest(row) not in seen)
+        ]
+
+    completed = state.get('laps') or {}
+    if not isinstance(completed, dict) or not all(
+            isinstance(lap, int) and not isinstance(lap, bool) for lap in completed.values()):
+        raise InvalidCursor("Invalid cursor")
+    result['all_laps'] = [
+        lap for lap in data.get('all_laps') or []
+        if (lap.get('lap_number') or 0) > completed.get(str(lap.get('driver_number')), 0)
+    ]
+
+    result['cursor'] = race_data_cursor(data)
+    return result
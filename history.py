@@ -0,0 +1,175 @@
+import argparse
+import concurrent.futures
+import os
+import sqlite3
+import time
+from typing import Dict, List
+
+from data_fetcher import OpenF1Client
+from standings import POINTS_SYSTEM
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS race_results (
+    year INTEGER NOT NULL,
+    session_key INTEGER NOT NULL,
+    driver_number INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    points INTEGER NOT NULL,
+    driver_name TEXT,
+    name_acronym TEXT,
+    team_name TEXT,
+    team_color TEXT,
+    PRIMARY KEY (session_key, driver_number)
+);
+CREATE INDEX IF NOT EXISTS race_results_year ON race_results (year);
+"""
+
+
+class HistoryStore:
+    """Race classifications of past seasons in a local SQLite database.
+
+    The batch job fills it; standings over any range of years are then
+    answered with a couple of indexed aggregate queries instead of upstream
+    calls. A connection is opened per call so the store can be shared
+    between threads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        conn.executescript(SCHEMA)
+        return conn
+
+    def save_race(self, year: int, session_key: int, classification: List[Dict]) -> None:
+        """Replace a race's stored results with its classification"""
+        rows = [
+            (year, session_key, row['driver_number'], row['position'], POINTS_SYSTEM.get(row['position'], 0),
+             row.get('full_name') or row.get('name_acronym'), row.get('name_acronym'),
+             row.get('team_name'), row.get('team_color'))
+            for row in classification
+        ]
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM race_results WHERE session_key = ?", (session_key,))
+                conn.executemany("INSERT INTO race_results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        finally:
+            conn.close()
+
+    def years(self) -> List[int]:
+        conn = self._connect()
+        try:
+            return [row[0] for row in conn.execute("SELECT DISTINCT year FROM race_results ORDER BY year")]
+        finally:
+            conn.close()
+
+    def standings(self, year_from: int, year_to: int) -> Dict:
+        """Driver and constructor totals over a range of seasons, with each season's points"""
+        conn = self._connect()
+        try:
+            # With a single max() aggregate SQLite takes the bare columns from the row holding the maximum,
+            # so number, team and color come from the driver's latest race of the season
+            driver_rows = conn.execute(
+                """
+                SELECT year, driver_name, driver_number, team_name, team_color, COUNT(*), SUM(points),
+                       SUM(position = 1), SUM(position <= 3), MAX(session_key)
+                FROM race_results
+                WHERE year BETWEEN ? AND ? AND driver_name IS NOT NULL
+                GROUP BY year, driver_name
+                ORDER BY year
+                """,
+                (year_from, year_to)
+            ).fetchall()
+            constructor_rows = conn.execute(
+                """
+                SELECT year, team_name, team_color, SUM(points), MAX(session_key)
+                FROM race_results
+                WHERE year BETWEEN ? AND ? AND team_name IS NOT NULL
+                GROUP BY year, team_name
+                ORDER BY year
+                """,
+                (year_from, year_to)
+            ).fetchall()
+        finally:
+            conn.close()
+
+        drivers = {}
+        for year, name, number, team, color, races, points, wins, podiums, _ in driver_rows:
+            driver = drivers.setdefault(name, {'name': name, 'points': 0, 'races': 0, 'wins': 0, 'podiums': 0,
+                                               'by_year': {}})
+            # Rows come in year order, so the latest season's team wins
+            driver.update({'driver_number': number, 'team': team, 'team_color': color})
+            driver['points'] += points
+            driver['races'] += races
+            driver['wins'] += wins
+            driver['podiums'] += podiums
+            driver['by_year'][year] = points
+
+        constructors = {}
+        for year, name, color, points, _ in constructor_rows:
+            constructor = constructors.setdefault(name, {'name': name, 'points': 0, 'by_year': {}})
+            constructor['team_color'] = color
+            constructor['points'] += points
+            constructor['by_year'][year] = points
+
+        return {
+            'years': sorted({row[0] for row in driver_rows}),
+            'drivers': sorted(drivers.values(), key=lambda x: x['points'], reverse=True),
+            'constructors': sorted(constructors.values(), key=lambda x: x['points'], reverse=True)
+        }
+
+
+def collect_seasons(client: OpenF1Client, store: HistoryStore, years: List[int], parallel_seasons: int = 2) -> int:
+    """Pull every finished race classification of the given seasons into the store, returning the race count.
+
+    Seasons run side by side on their own small pool; the races within a
+    season are fetched on the client's executor, which bounds the total
+    number of upstream requests in flight.
+    """
+    races = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=parallel_seasons) as seasons:
+        futures = {seasons.submit(client.standings.race_classifications, year): year for year in years}
+        for future in concurrent.futures.as_completed(futures):
+            year = futures[future]
+            try:
+                classifications = future.result()
+            except Exception as e:
+                print(f"Error collecting {year}: {e}")
+                continue
+            # A race still running has a partial classification, which the next run would never revisit
+            finished = [race for race in classifications if client.is_session_finished(race[0])]
+            for session_key, classification in finished:
+                store.save_race(year, session_key, classification)
+            races += len(finished)
+            print(f"{year}: {len(finished)} races")
+    return races
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Collect past seasons into the local history database')
+    parser.add_argument('year_from', type=int)
+    parser.add_argument('year_to', type=int, nargs='?', help='Last season to collect (defaults to year_from)')
+    parser.add_argument('--db', default=os.environ.get('PITWALL_HISTORY_DB', 'history.db'))
+    parser.add_argument('--archive-dir', default=os.environ.get('PITWALL_ARCHIVE_DIR', 'archive'))
+    parser.add_argument('--workers', type=int, default=16, help='Upstream requests in flight at once')
+    parser.add_argument('--parallel-seasons', type=int, default=2)
+    args = parser.parse_args()
+
+    years = list(range(args.year_from, (args.year_to or args.year_from) + 1))
+    client = OpenF1Client(archive_dir=args.archive_dir, max_workers=args.workers, pool_maxsize=args.workers)
+    store = HistoryStore(args.db)
+    started = time.monotonic()
+    try:
+        races = collect_seasons(client, store, years, args.parallel_seasons)
+    finally:
+        client.close()
+    print(f"Stored {races} races from {years[0]}-{years[-1]} in {args.db} ({time.monotonic() - started:.1f}s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+import json
+from datetime import date, datetime
+from typing import Any
+
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson is optional - fall back to the stdlib encoder
+    orjson = None
+
+
+class PreEncoded:
+    """Already-serialized JSON that is embedded as-is instead of being encoded again"""
+
+    __slots__ = ('data',)
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(JSONProvider):
+    """Flask JSON provider that uses orjson when installed and the stdlib otherwise.
+
+    PreEncoded values are spliced into the output without re-encoding, either
+    as the whole response or as values of a top-level dict or list.
+    """
+
+    def encode(self, obj: Any) -> bytes:
+        if isinstance(obj, PreEncoded):
+            return obj.data
+        if isinstance(obj, dict) and any(isinstance(v, PreEncoded) for v in obj.values()):
+            items = [self._encode(str(k)) + b':' + self.encode(v) for k, v in obj.items()]
+            return b'{' + b','.join(items) + b'}'
+        if isinstance(obj, list) and any(isinstance(v, PreEncoded) for v in obj):
+            return b'[' + b','.join(self.encode(v) for v in obj) + b']'
+        return self._encode(obj)
+
+    @staticmethod
+    def _encode(obj: Any) -> bytes:
+        if orjson:
+            return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(obj, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return self.encode(obj).decode('utf-8')
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        return orjson.loads(s) if orjson else json.loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.encode(obj), mimetype='application/json')
@@ -0,0 +1,162 @@
+import heapq
+import math
+import sys
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional (see requirements.txt) - analytics fall back to plain loops
+    np = None
+
+# Typed columns: 'i' for integers (missing = -1), 'd' for floats (missing = NaN)
+NUMERIC_COLUMNS = {
+    'driver_number': 'i',
+    'lap_number': 'i',
+    'lap_duration': 'd',
+    'duration_sector_1': 'd',
+    'duration_sector_2': 'd',
+    'duration_sector_3': 'd',
+    'i1_speed': 'd',
+    'i2_speed': 'd',
+    'st_speed': 'd'
+}
+MISSING = {'i': -1, 'd': math.nan}
+
+
+class LapColumns:
+    """Laps of one session stored column-wise in typed arrays.
+
+    Numeric fields live in array.array columns; any other field is kept as a
+    plain list. With numpy installed the analytics run vectorized over
+    zero-copy views of the arrays.
+    """
+
+    def __init__(self, laps: Iterable[Dict]):
+        self.columns: Dict[str, array] = {name: array(code) for name, code in NUMERIC_COLUMNS.items()}
+        self.extras: Dict[str, List] = {}
+        self.length = 0
+        for lap in laps:
+            self.append(lap)
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, List], length: int) -> 'LapColumns':
+        """Build from per-field value lists, such as an exported table's columns"""
+        laps = cls(())
+        for name, code in NUMERIC_COLUMNS.items():
+            values = columns.get(name) or [None] * length
+            laps.columns[name] = array(code, (MISSING[code] if value is None else value for value in values))
+        laps.extras = {name: values for name, values in columns.items()
+                       if name not in NUMERIC_COLUMNS and name != 'driver_info'}
+        laps.length = length
+        return laps
+
+    def __len__(self) -> int:
+        return self.length
+
+    def nbytes(self) -> int:
+        """Approximate memory held, for sizing cache entries"""
+        numeric = sum(column.buffer_info()[1] * column.itemsize for column in self.columns.values())
+        # Shallow sizes - nested values such as segment lists are counted once per list
+        return numeric + sum(sys.getsizeof(column) + sum(map(sys.getsizeof, column)) for column in self.extras.values())
+
+    def append(self, lap: Dict) -> None:
+        for name, code in NUMERIC_COLUMNS.items():
+            value = lap.get(name)
+            self.columns[name].append(MISSING[code] if value is None else value)
+        for name, value in lap.items():
+            if name in NUMERIC_COLUMNS or name == 'driver_info':
+                continue
+            column = self.extras.get(name)
+            if column is None:
+                # Field first seen on a later lap - backfill earlier rows
+                column = self.extras[name] = [None] * self.length
+            column.append(value)
+        self.length += 1
+        for column in self.extras.values():
+            if len(column) < self.length:
+                column.append(None)
+
+    def _view(self, name: str):
+        column = self.columns[name]
+        return np.frombuffer(column, dtype=np.int32 if column.typecode == 'i' else np.float64)
+
+    def _valid_durations(self) -> List[int]:
+        durations = self.columns['lap_duration']
+        return [i for i in range(self.length) if durations[i] > 0]
+
+    def fastest(self, limit: int = 10) -> List[int]:
+        """Indices of the fastest valid laps, quickest first"""
+        limit = max(limit, 0)
+        if np:
+            durations = self._view('lap_duration')
+            valid = np.flatnonzero(durations > 0)
+            if limit < len(valid):
+                valid = valid[np.argpartition(durations[valid], limit)[:limit]]
+            return valid[np.argsort(durations[valid], kind='stable')].tolist()
+        durations = self.columns['lap_duration']
+        return heapq.nsmallest(limit, self._valid_durations(), key=lambda i: durations[i])
+
+    def select(self, driver_number: Optional[int] = None, lap_from: Optional[int] = None,
+               lap_to: Optional[int] = None) -> List[int]:
+        """Indices of laps matching a driver and lap-number range"""
+        if np:
+            mask = np.ones(self.length, dtype=bool)
+            if driver_number is not None:
+                mask &= self._view('driver_number') == driver_number
+            if lap_from is not None:
+                mask &= self._view('lap_number') >= lap_from
+            if lap_to is not None:
+                mask &= self._view('lap_number') <= lap_to
+            return np.flatnonzero(mask).tolist()
+        drivers, lap_numbers = self.columns['driver_number'], self.columns['lap_number']
+        return [
+            i for i in range(self.length)
+            if (driver_number is None or drivers[i] == driver_number)
+            and (lap_from is None or lap_numbers[i] >= lap_from)
+            and (lap_to is None or lap_numbers[i] <= lap_to)
+        ]
+
+    def driver_summary(self) -> Dict[int, Dict]:
+        """Per-driver lap count, best and average over laps with a valid time"""
+        if np:
+            drivers = self._view('driver_number')
+            durations = self._view('lap_duration')
+            valid = durations > 0
+            summary = {}
+            for driver in np.unique(drivers[valid]).tolist():
+                times = durations[valid & (drivers == driver)]
+                summary[driver] = {
+                    'laps': int(times.size),
+                    'best': float(times.min()),
+                    'average': float(times.mean())
+                }
+            return summary
+
+        totals = {}
+        drivers, durations = self.columns['driver_number'], self.columns['lap_duration']
+        for i in self._valid_durations():
+            entry = totals.setdefault(drivers[i], {'laps': 0, 'best': math.inf, 'total': 0.0})
+            entry['laps'] += 1
+            entry['best'] = min(entry['best'], durations[i])
+            entry['total'] += durations[i]
+        return {
+            driver: {'laps': t['laps'], 'best': t['best'], 'average': t['total'] / t['laps']}
+            for driver, t in totals.items()
+        }
+
+    def rows(self, indices: Iterable[int], fields: Optional[List[str]] = None) -> List[Dict]:
+        """Materialize laps back into dicts, optionally projected to some fields"""
+        names = fields or list(NUMERIC_COLUMNS) + list(self.extras)
+        result = []
+        for i in indices:
+            row = {}
+            for name in names:
+                if name in self.columns:
+                    value = self.columns[name][i]
+                    code = NUMERIC_COLUMNS[name]
+                    row[name] = None if (code == 'i' and value == -1) or (code == 'd' and math.isnan(value)) else value
+                elif name in self.extras:
+                    row[name] = self.extras[name][i]
+            result.append(row)
+        return result
@@ -0,0 +1,64 @@
+import heapq
+import threading
+from typing import Dict, Iterable, List
+
+
+class FastestLapBoard:
+    """Fastest laps of one session, maintained incrementally as laps arrive.
+
+    Only the best `capacity` laps are kept, in a bounded heap whose root is the
+    slowest of them, so adding a lap costs O(log capacity) however long the
+    session gets. Each driver's personal best is tracked alongside.
+    """
+
+    def __init__(self, capacity: int = 100):
+        self.capacity = capacity
+        self.personal_best: Dict[int, Dict] = {}
+        # (-lap_duration, -arrival, lap): the root is the slowest kept lap, ties evict the latest
+        self._top = []
+        self._seen = set()
+        self._arrivals = 0
+        self._ranked = None
+        self._lock = threading.Lock()
+
+    def add(self, lap: Dict) -> bool:
+        """Add a completed lap; returns False for laps without a time or already seen"""
+        duration = lap.get('lap_duration')
+        if not duration or duration <= 0:
+            return False
+        key = (lap.get('driver_number'), lap.get('lap_number'))
+
+        with self._lock:
+            if key in self._seen:
+                return False
+            self._seen.add(key)
+            self._arrivals += 1
+            entry = (-duration, -self._arrivals, lap)
+            if len(self._top) < self.capacity:
+                heapq.heappush(self._top, entry)
+                self._ranked = None
+            elif self._top and entry > self._top[0]:
+                heapq.heapreplace(self._top, entry)
+                self._ranked = None
+
+            best = self.personal_best.get(key[0])
+            if best is None or duration < best['lap_duration']:
+                self.personal_best[key[0]] = lap
+        return True
+
+    def update(self, laps: Iterable[Dict]) -> int:
+        """Add every new completed lap, returning how many were added"""
+        return sum(self.add(lap) for lap in laps or [])
+
+    def fastest(self, limit: int = 10) -> List[Dict]:
+        """The fastest laps so far, quickest first (at most `capacity`)"""
+        with self._lock:
+            if self._ranked is None:
+                self._ranked = [entry[2] for entry in sorted(self._top, reverse=True)]
+            return self._ranked[:max(limit, 0)]
+
+    def personal_bests(self) -> List[Dict]:
+        """Each driver's fastest lap, quickest first"""
+        with self._lock:
+            laps = list(self.personal_best.values())
+        return sorted(laps, key=lambda lap: lap['lap_duration'])
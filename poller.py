@@ -0,0 +1,283 @@
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from data_fetcher import normalize_race_data, session_has_started
+from leaderboard import FastestLapBoard
+from stream import EventLog
+
+
+class LivePoller:
+    """Background ingestion of the live session into an in-memory snapshot.
+
+    The poller, not viewer traffic, drives upstream requests: each race-data
+    section is refreshed on its own schedule and /api routes read the latest
+    snapshot instead of calling OpenF1Client directly.
+    """
+
+    # Seconds between refreshes of each race-data section
+    SCHEDULE = {
+        'session_info': 60,
+        'drivers': 300,
+        'positions': 4,
+        'intervals': 4,
+        'race_control': 5,
+        'pit_stops': 10,
+        'team_radio': 10,
+        'all_laps': 10,
+        'fastest_laps': 10,
+        'stints': 20,
+        'weather': 60
+    }
+    # Sections whose new rows are published to the session's event log
+    STREAMED_SECTIONS = ('positions', 'intervals', 'pit_stops', 'race_control', 'team_radio', 'all_laps')
+    # Sections that are revised rather than appended to, so they are published whole whenever they change
+    REPLACED_SECTIONS = ('session_info', 'stints', 'weather', 'fastest_laps')
+    SESSION_CHECK_INTERVAL = 60
+    TICK = 1
+
+    def __init__(self, client, schedule: Optional[Dict[str, float]] = None):
+        self.client = client
+        self.schedule = {**self.SCHEDULE, **(schedule or {})}
+        self.current_session = None
+        self.live_session_key = None
+        self.snapshots = {}
+        self.versions = {}
+        self.event_logs = {}
+        self._seen = {}
+        self.listeners = []
+        self.boards = {}
+        # Open streams per session tracked on demand
+        self.watchers = {}
+        self._normalized = {}
+        self.polls = 0
+        self.errors = 0
+        self._due = {}
+        self._next_session_check = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _fetchers(self, session_key: int) -> Dict[str, Callable]:
+        client = self.client
+        return {
+            'session_info': lambda: client.get_session_info(session_key),
+            'drivers': lambda: client.get_drivers(session_key),
+            'positions': lambda: client.get_latest_positions(session_key),
+            'intervals': lambda: client.get_intervals(session_key),
+            'race_control': lambda: client.get_race_control_messages(session_key),
+            'pit_stops': lambda: client.get_pit_stops(session_key),
+            'team_radio': lambda: client.get_team_radio(session_key),
+            'all_laps': lambda: client.get_lap_data(session_key),
+            # Read from the incrementally maintained board rather than downloading laps again
+            'fastest_laps': lambda: self.fastest_laps(session_key, 10) or [],
+            'stints': lambda: client.get_stints(session_key),
+            'weather': lambda: client.get_weather(session_key)
+        }
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='live-poller', daemon=True)
+            self._thread.start()
+
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                self.errors += 1
+                print(f"Error in live poller: {e}")
+            self._stop.wait(self.TICK)
+
+    def poll_once(self) -> None:
+        """Refresh the live session detection and every section that is due"""
+        now = time.monotonic()
+        if now >= self._next_session_check:
+            self._next_session_check = now + self.SESSION_CHECK_INTERVAL
+            self._check_session()
+
+        for session_key in list(self.snapshots):
+            for section, fetch in self._fetchers(session_key).items():
+                if self._due.get((session_key, section), 0) > now:
+                    continue
+                self._due[(session_key, section)] = now + self.schedule[section]
+                self._refresh(session_key, section, fetch)
+
+    def _check_session(self) -> None:
+        """Track the session running now and drop sessions that ended"""
+        self.current_session = self.client.get_current_session()
+        # The most recent session may only be scheduled, so look for the one in progress
+        live = self.client.get_live_session()
+        self.live_session_key = live.get('session_key') if live else None
+
+        if self.live_session_key:
+            self._track(self.live_session_key)
+
+        for tracked in list(self.snapshots):
+            if self.client.is_session_finished(tracked):
+                self._drop(tracked)
+
+    def _track(self, session_key: int) -> EventLog:
+        with self._lock:
+            self.snapshots.setdefault(session_key, {})
+            return self.event_logs.setdefault(session_key, EventLog())
+
+    def watch(self, session_key: int) -> Optional[EventLog]:
+        """Start polling a session for a subscriber, returning its event log, if it exists and is live.
+
+        Returns None when the poller thread isn't running, since nothing would
+        publish to the log. Every successful watch() must be paired with
+        unwatch() when the subscriber goes away.
+        """
+        if not self.running():
+            return None
+        if session_key not in self.snapshots:
+            info = self.client.get_session_info(session_key)
+            if not info or not session_has_started(info) or self.client.is_session_finished(session_key):
+                return None
+        with self._lock:
+            self.watchers[session_key] = self.watchers.get(session_key, 0) + 1
+        return self._track(session_key)
+
+    def unwatch(self, session_key: int) -> None:
+        """Release a watch(); on-demand sessions stop being polled once nobody watches them"""
+        with self._lock:
+            remaining = self.watchers.get(session_key, 0) - 1
+            if remaining > 0:
+                self.watchers[session_key] = remaining
+                return
+            self.watchers.pop(session_key, None)
+        if session_key != self.live_session_key:
+            self._drop(session_key)
+
+    def _drop(self, session_key: int) -> None:
+        with self._lock:
+            self.snapshots.pop(session_key, None)
+            self.versions.pop(session_key, None)
+            log = self.event_logs.pop(session_key, None)
+            self._normalized.pop(session_key, None)
+            self.boards.pop(session_key, None)
+        if log:
+            log.close()
+        for key in [k for k in self._due if k[0] == session_key]:
+            self._due.pop(key, None)
+        for key in [k for k in self._seen if k[0] == session_key]:
+            self._seen.pop(key, None)
+
+    def _refresh(self, session_key: int, section: str, fetch: Callable) -> None:
+        try:
+            value = fetch()
+        except Exception as e:
+            self.errors += 1
+            print(f"Error polling {section} for session {session_key}: {e}")
+            return
+        self.polls += 1
+
+        with self._lock:
+            snapshot = self.snapshots.get(session_key)
+            if snapshot is None:
+                return
+            # Keep the last good value rather than blanking the dashboard on an upstream error
+            previous = snapshot.get(section)
+            if not value and previous:
+                return
+            # Swap in a new dict so readers always see a consistent snapshot
+            self.snapshots[session_key] = {**snapshot, section: value}
+            self.versions[session_key] = self.versions.get(session_key, 0) + 1
+
+        if section == 'all_laps':
+            # Only laps the board hasn't seen cost a heap update
+            self.boards.setdefault(session_key, FastestLapBoard()).update(value)
+        if section in self.STREAMED_SECTIONS:
+            self._publish_new_rows(session_key, section, value)
+        elif section in self.REPLACED_SECTIONS and previous is not None and value != previous:
+            log = self.event_logs.get(session_key)
+            if log:
+                log.publish(section, {'session_key': session_key, 'data': value})
+
+    def _publish_new_rows(self, session_key: int, section: str, rows) -> None:
+        """Publish rows not seen in earlier polls; the first poll only seeds the seen set"""
+        first_poll = (session_key, section) not in self._seen
+        seen = self._seen.setdefault((session_key, section), set())
+
+        new_rows = []
+        for row in rows or []:
+            identity = self._row_identity(row)
+            if identity not in seen:
+                seen.add(identity)
+                new_rows.append(row)
+
+        if not new_rows or first_poll:
+            return
+        log = self.event_logs.get(session_key)
+        if log:
+            log.publish(section, {'session_key': session_key, 'rows': new_rows})
+        for listener in self.listeners:
+            listener(session_key, section, new_rows)
+
+    def add_listener(self, listener: Callable) -> None:
+        """Register listener(session_key, section, rows), called from the poller thread on new rows"""
+        self.listeners.append(listener)
+
+    @staticmethod
+    def _row_identity(row: Dict) -> tuple:
+        # Embedded objects such as driver_info don't identify a row. A revised row (a lap that gained its
+        # time) is new by this identity and published again, so clients replace laps by driver and lap number
+        return tuple(sorted((k, v) for k, v in row.items() if not isinstance(v, (dict, list))))
+
+    def get(self, session_key: int, section: str):
+        """Return a section from the live snapshot, or None if it is not being polled"""
+        snapshot = self.snapshots.get(session_key)
+        if snapshot is None:
+            return None
+        return snapshot.get(section)
+
+    def fastest_laps(self, session_key: int, limit: int = 10) -> Optional[List[Dict]]:
+        """Return the session's fastest laps, or None if it is not being polled"""
+        board = self.boards.get(session_key)
+        return board.fastest(limit) if board else None
+
+    def personal_bests(self, session_key: int) -> Optional[List[Dict]]:
+        """Return each driver's fastest lap, or None if the session is not being polled"""
+        board = self.boards.get(session_key)
+        return board.personal_bests() if board else None
+
+    def get_race_data(self, session_key: int, normalized: bool = False) -> Optional[Dict]:
+        """Return the full race-data snapshot once every section has been fetched"""
+        snapshot = self.snapshots.get(session_key)
+        if snapshot is None or len(snapshot) < len(self.schedule):
+            return None
+        if not normalized:
+            return snapshot
+
+        # Normalize once per snapshot version, not once per request
+        version = self.versions.get(session_key)
+        cached = self._normalized.get(session_key)
+        if cached and cached[0] == version:
+            return cached[2]
+        # Sections that haven't changed since the last version keep their normalized rows
+        data = normalize_race_data(snapshot, cached[1:] if cached else None)
+        self._normalized[session_key] = (version, snapshot, data)
+        return data
+
+    def stats(self) -> Dict:
+        return {
+            'running': bool(self._thread and self._thread.is_alive()),
+            'sessions': list(self.snapshots),
+            'watchers': dict(self.watchers),
+            'versions': dict(self.versions),
+            'events': {key: log.last_id for key, log in list(self.event_logs.items())},
+            'polls': self.polls,
+            'errors': self.errors
+        }
@@ -0,0 +1,59 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List
+
+import ijson
+
+
+class Reducer(ABC):
+    """Folds rows one at a time into a small result, so the rows never need to be held together"""
+
+    # Used in cache and archive keys of reduced responses
+    name = 'reduce'
+
+    @abstractmethod
+    def add(self, row: Dict) -> None:
+        ...
+
+    @abstractmethod
+    def result(self) -> Any:
+        ...
+
+
+class LatestPerDriver(Reducer):
+    """Each driver's most recent row, sorted by position"""
+
+    name = 'latest_per_driver'
+
+    def __init__(self):
+        self.latest = {}
+
+    def add(self, row: Dict) -> None:
+        driver_num = row.get('driver_number')
+        if not driver_num:
+            return
+        current = self.latest.get(driver_num)
+        if current is None or row.get('date', '') > current.get('date', ''):
+            self.latest[driver_num] = row
+
+    def result(self) -> List[Dict]:
+        return sorted(self.latest.values(), key=lambda x: x.get('position', 999))
+
+
+def reduce_rows(rows: Iterable[Dict], reducer: Reducer) -> Any:
+    for row in rows:
+        reducer.add(row)
+    return reducer.result()
+
+
+def iter_response_rows(response) -> Iterable[Dict]:
+    """Yield the rows of a JSON array response, parsing it incrementally.
+
+    The response must have been requested with stream=True for the body not to
+    be read up front.
+    """
+    # Let urllib3 undo any gzip transfer encoding before ijson sees the bytes
+    response.raw.decode_content = True
+    try:
+        yield from ijson.items(response.raw, 'item', use_float=True)
+    except ijson.JSONError as e:
+        raise ValueError(f"Invalid JSON: {e}")
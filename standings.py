@@ -0,0 +1,305 @@
+import json
+import os
+import tempfile
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# Driver fields kept in a race classification, alongside the finishing position
+CLASSIFICATION_FIELDS = ('driver_number', 'full_name', 'name_acronym', 'team_name', 'team_color')
+
+# F1 points system
+POINTS_SYSTEM = {
+    1: 25, 2: 18, 3: 15, 4: 12, 5: 10,
+    6: 8, 7: 6, 8: 4, 9: 2, 10: 1
+}
+
+
+def race_contribution(positions: List[Dict], drivers_by_number: Dict[int, Dict]) -> Dict:
+    """What a single race adds to each driver's and constructor's totals"""
+    drivers = {}
+    constructors = {}
+    for pos in positions:
+        position = pos.get('position')
+        driver_num = pos.get('driver_number')
+        if not position or not driver_num:
+            continue
+        
+        driver_info = drivers_by_number.get(driver_num)
+        if not driver_info:
+            continue
+        
+        driver_name = driver_info.get('full_name') or driver_info.get('name_acronym')
+        team_name = driver_info.get('team_name')
+        if not driver_name:
+            continue
+        
+        points = POINTS_SYSTEM.get(position, 0)
+        driver = drivers.setdefault(driver_name, {
+            'points': 0,
+            'team': team_name,
+            'team_color': driver_info.get('team_color'),
+            'driver_number': driver_num,
+            'podiums': 0,
+            'wins': 0
+        })
+        driver['points'] += points
+        driver['podiums'] += position <= 3
+        driver['wins'] += position == 1
+        
+        if team_name:
+            constructor = constructors.setdefault(team_name, {'points': 0, 'team_color': driver_info.get('team_color')})
+            constructor['points'] += points
+    return {'drivers': drivers, 'constructors': constructors}
+
+
+class SeasonTally:
+    """Running championship totals plus the log of what each race contributed.
+
+    Applying a race adds its contribution; applying it again with a changed
+    contribution (a corrected classification) retracts the old one first, so
+    the totals never need a replay of the whole season. With a path the tally
+    is persisted as JSON after every change.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.contributions: Dict[str, Dict] = {}
+        self.drivers: Dict[str, Dict] = {}
+        self.constructors: Dict[str, Dict] = {}
+        if path and os.path.exists(path):
+            self._load()
+
+    def apply(self, race_key, contribution: Dict) -> bool:
+        """Add a race's contribution, replacing an earlier one; returns False if nothing changed"""
+        race_key = str(race_key)
+        previous = self.contributions.get(race_key)
+        if previous == contribution:
+            return False
+        if previous is not None:
+            self._add(previous, -1)
+        self._add(contribution, 1)
+        self.contributions[race_key] = contribution
+        self._save()
+        return True
+
+    def retract(self, race_key) -> bool:
+        """Remove a race's contribution; returns False if it was never applied"""
+        contribution = self.contributions.pop(str(race_key), None)
+        if contribution is None:
+            return False
+        self._add(contribution, -1)
+        self._save()
+        return True
+
+    def _add(self, contribution: Dict, sign: int) -> None:
+        for name, delta in contribution['drivers'].items():
+            driver = self.drivers.setdefault(name, {
+                'points': 0,
+                'team': delta['team'],
+                'team_color': delta['team_color'],
+                'driver_number': delta['driver_number'],
+                'podiums': 0,
+                'wins': 0,
+                'races': 0
+            })
+            for field in ('points', 'podiums', 'wins'):
+                driver[field] += sign * delta[field]
+            driver['races'] += sign
+            if driver['races'] <= 0:
+                del self.drivers[name]
+        
+        for name, delta in contribution['constructors'].items():
+            constructor = self.constructors.setdefault(name, {'points': 0, 'team_color': delta['team_color'], 'races': 0})
+            constructor['points'] += sign * delta['points']
+            constructor['races'] += sign
+            if constructor['races'] <= 0:
+                del self.constructors[name]
+
+    def standings(self) -> Dict:
+        """Current standings, in the shape calculate_championship_standings returns"""
+        # Sort drivers by points
+        drivers_sorted = sorted(
+            [{'name': k, **{f: v for f, v in d.items() if f != 'races'}} for k, d in self.drivers.items()],
+            key=lambda x: x['points'],
+            reverse=True
+        )
+        
+        # Sort constructors by points
+        constructors_sorted = sorted(
+            [{'name': k, 'points': c['points'], 'team_color': c['team_color']} for k, c in self.constructors.items()],
+            key=lambda x: x['points'],
+            reverse=True
+        )
+        
+        # Get all podium finishers
+        podium_finishers = sorted(
+            [d for d in drivers_sorted if d['podiums'] > 0],
+            key=lambda x: x['podiums'],
+            reverse=True
+        )
+        
+        return {
+            'drivers': drivers_sorted[:10],
+            'constructors': constructors_sorted[:5],
+            'podium_finishers': podium_finishers,
+            'all_drivers': drivers_sorted
+        }
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading standings {self.path}: {e}")
+            return
+        self.contributions = state.get('contributions', {})
+        self.drivers = state.get('drivers', {})
+        self.constructors = state.get('constructors', {})
+
+    def _save(self) -> None:
+        """Write the tally atomically so a crash never leaves totals and log out of step"""
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        state = {'contributions': self.contributions, 'drivers': self.drivers, 'constructors': self.constructors}
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(state, f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Error writing standings {self.path}: {e}")
+
+
+class StandingsEngine:
+    """Championship standings built from per-race classifications.
+
+    A classification is a race's final positions joined with each driver's
+    name and team. Once a race has finished its classification never changes,
+    so it is kept in memory and in the client's archive and later runs only
+    fetch races that are new. Races are fetched concurrently on the client's
+    executor, and each season's totals are a SeasonTally kept next to the
+    archive, to which only new or changed races are applied.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.classifications = {}
+        # meeting_key -> race session, remembered once that race has finished
+        self.race_sessions = {}
+        self.tallies = {}
+        self.computed = 0
+        self._lock = threading.Lock()
+        self._tally_lock = threading.Lock()
+
+    def _race_session(self, meeting_key: int) -> Optional[Dict]:
+        race_session = self.race_sessions.get(meeting_key)
+        if race_session:
+            return race_session
+        sessions = self.client.get_sessions_for_meeting(meeting_key)
+        race_session = next((s for s in sessions if s.get('session_name') == 'Race'), None)
+        if race_session and self.client.is_session_finished(race_session['session_key']):
+            self.race_sessions[meeting_key] = race_session
+        return race_session
+
+    def _load(self, session_key: int) -> Optional[List[Dict]]:
+        classification = self.classifications.get(session_key)
+        if classification is None and self.client.archive:
+            classification = self.client.archive.load('classification', {'session_key': session_key})
+            if classification is not None:
+                with self._lock:
+                    self.classifications[session_key] = classification
+        return classification
+
+    def _compute(self, session_key: int) -> List[Dict]:
+        """Classify a race from its latest positions, persisting it once the race has finished"""
+        drivers = self.client.get_driver_index(session_key)
+        classification = []
+        for pos in self.client.get_latest_positions(session_key, with_driver_info=False):
+            driver = drivers.get(pos.get('driver_number'))
+            if driver and pos.get('position'):
+                classification.append({
+                    'position': pos['position'],
+                    **{field: driver.get(field) for field in CLASSIFICATION_FIELDS}
+                })
+
+        with self._lock:
+            self.computed += 1
+        # An unfinished race may still change - compute it again next time
+        if classification and self.client.is_session_finished(session_key):
+            with self._lock:
+                self.classifications[session_key] = classification
+            if self.client.archive:
+                self.client.archive.save('classification', {'session_key': session_key}, classification)
+        return classification
+
+    def _classify_meeting(self, meeting_key: int) -> Optional[Tuple[int, List[Dict]]]:
+        # Imported here because data_fetcher builds its StandingsEngine from this module
+        from data_fetcher import session_has_started
+        race_session = self._race_session(meeting_key)
+        # A race that hasn't started has nothing to classify yet
+        if not race_session or not session_has_started(race_session):
+            return None
+        session_key = race_session['session_key']
+        classification = self._load(session_key)
+        return session_key, classification if classification is not None else self._compute(session_key)
+
+    def race_classifications(self, year: int) -> List[Tuple[int, List[Dict]]]:
+        """(session_key, classification) of every race held so far in a season, in meeting order"""
+        futures = [self.client.submit(self._classify_meeting, meeting['meeting_key'])
+                   for meeting in self.client.get_meetings(year)]
+        classifications = []
+        for future in futures:
+            try:
+                race = future.result()
+            except Exception as e:
+                print(f"Error classifying race: {e}")
+                continue
+            if race and race[1]:
+                classifications.append(race)
+        return classifications
+
+    def tally(self, year: int) -> SeasonTally:
+        tally = self.tallies.get(year)
+        if tally is None:
+            archive = self.client.archive
+            path = os.path.join(archive.root, 'standings', f"{year}.json") if archive else None
+            tally = self.tallies[year] = SeasonTally(path)
+        return tally
+
+    @staticmethod
+    def _contribution(classification: List[Dict]) -> Dict:
+        # A classification row carries both the position and the driver record
+        return race_contribution(classification, {row['driver_number']: row for row in classification})
+
+    def standings(self, year: int) -> Dict:
+        """Driver and constructor standings for a season, applying only races that are new or changed"""
+        races = self.race_classifications(year)
+        with self._tally_lock:
+            tally = self.tally(year)
+            for session_key, classification in races:
+                tally.apply(session_key, self._contribution(classification))
+            return tally.standings()
+
+    def reclassify(self, session_key: int) -> Optional[List[Dict]]:
+        """Recompute a race's classification and swap its contribution in its season's tally"""
+        with self._lock:
+            self.classifications.pop(session_key, None)
+        year = self.client.get_session_info(session_key).get('year')
+        classification = self._compute(session_key)
+        if year:
+            with self._tally_lock:
+                tally = self.tally(year)
+                if classification:
+                    tally.apply(session_key, self._contribution(classification))
+                else:
+                    tally.retract(session_key)
+        return classification
+
+    def stats(self) -> Dict:
+        return {
+            'classifications': len(self.classifications),
+            'computed': self.computed,
+            'seasons': {year: len(tally.contributions) for year, tally in list(self.tallies.items())}
+        }
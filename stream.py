@@ -0,0 +1,47 @@
+import threading
+from collections import deque
+from typing import Any, List, Optional, Tuple
+
+
+class EventLog:
+    """Bounded, sequenced log of updates for one session that subscribers can resume from"""
+
+    def __init__(self, capacity: int = 1000):
+        self.last_id = 0
+        self.closed = False
+        self._events: deque = deque(maxlen=capacity)
+        self._cond = threading.Condition()
+
+    def publish(self, event_type: str, data: Any) -> int:
+        """Append an event and wake every waiting subscriber"""
+        with self._cond:
+            self.last_id += 1
+            self._events.append((self.last_id, event_type, data))
+            self._cond.notify_all()
+            return self.last_id
+
+    def close(self) -> None:
+        """Mark the log as finished so subscribers can end their streams"""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def since(self, last_id: int) -> Optional[List[Tuple[int, str, Any]]]:
+        """Events after last_id, or None if some of them already fell out of the buffer"""
+        with self._cond:
+            return self._since(last_id)
+
+    def _since(self, last_id: int) -> Optional[List[Tuple[int, str, Any]]]:
+        if last_id > self.last_id:
+            return None
+        if self._events and last_id < self._events[0][0] - 1:
+            return None
+        if not self._events and last_id < self.last_id:
+            return None
+        return [event for event in self._events if event[0] > last_id]
+
+    def wait(self, last_id: int, timeout: float) -> Optional[List[Tuple[int, str, Any]]]:
+        """Block until there are events after last_id, the log closes, or timeout expires"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.last_id > last_id or self.closed, timeout=timeout)
+            return self._since(last_id)
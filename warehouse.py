@@ -0,0 +1,163 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+# Row fields copied into indexed columns; everything else stays in the JSON data column
+INDEXED_COLUMNS = ('session_key', 'meeting_key', 'driver_number', 'date', 'lap_number')
+# Fields that identify a row, so a later version of it (a lap that gained its time) replaces the earlier one
+NATURAL_KEYS = {
+    'meetings': ('meeting_key',),
+    'sessions': ('session_key',),
+    'drivers': ('session_key', 'driver_number'),
+    'laps': ('session_key', 'driver_number', 'lap_number'),
+    'stints': ('session_key', 'driver_number', 'stint_number'),
+    'pit': ('session_key', 'driver_number', 'lap_number'),
+    'position': ('session_key', 'driver_number', 'date'),
+    'intervals': ('session_key', 'driver_number', 'date'),
+    'car_data': ('session_key', 'driver_number', 'date'),
+    'location': ('session_key', 'driver_number', 'date')
+}
+
+
+class Warehouse:
+    """Local SQLite copy of every OpenF1 response, one table per endpoint.
+
+    Rows are upserted by their natural key with session_key, meeting_key,
+    driver_number, date and lap_number in indexed columns, so requests that
+    were stored once can be answered locally and cross-session questions
+    become single queries. Each thread uses its own connection.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.reads = 0
+        self.writes = 0
+        self._local = threading.local()
+        self._tables = set()
+        self._lock = threading.Lock()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS requests (endpoint TEXT, params TEXT, PRIMARY KEY (endpoint, params))")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=30)
+        return conn
+
+    @staticmethod
+    def accepts(endpoint: str) -> bool:
+        return endpoint.isidentifier()
+
+    def _table(self, endpoint: str) -> str:
+        """Create the endpoint's table and indexes on first use"""
+        if endpoint not in self._tables:
+            with self._lock:
+                self._conn().executescript(f"""
+                    CREATE TABLE IF NOT EXISTS {endpoint} (
+                        row_key TEXT PRIMARY KEY,
+                        session_key INTEGER,
+                        meeting_key INTEGER,
+                        driver_number INTEGER,
+                        date TEXT,
+                        lap_number INTEGER,
+                        data TEXT NOT NULL
+                    );
+                    CREATE INDEX IF NOT EXISTS {endpoint}_session ON {endpoint} (session_key, driver_number, lap_number);
+                    CREATE INDEX IF NOT EXISTS {endpoint}_driver ON {endpoint} (driver_number);
+                    CREATE INDEX IF NOT EXISTS {endpoint}_date ON {endpoint} (date);
+                """)
+                self._tables.add(endpoint)
+        return endpoint
+
+    @staticmethod
+    def _params_key(params: Optional[Dict]) -> str:
+        return json.dumps(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+
+    @staticmethod
+    def _row_key(endpoint: str, row: Dict, data: str) -> str:
+        fields = NATURAL_KEYS.get(endpoint)
+        if fields and all(row.get(field) is not None for field in fields):
+            return '|'.join(str(row[field]) for field in fields)
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+    def store(self, endpoint: str, params: Optional[Dict], rows: List[Dict], replayable: bool = False) -> None:
+        """Upsert a response's rows; replayable marks the response as final, so load() may answer it"""
+        if not self.accepts(endpoint):
+            return
+        table = self._table(endpoint)
+        values = []
+        for row in rows:
+            data = json.dumps(row, separators=(',', ':'))
+            indexed = [row.get(column) for column in INDEXED_COLUMNS]
+            if indexed[3] is None:
+                indexed[3] = row.get('date_start')
+            values.append((self._row_key(endpoint, row, data), *indexed, data))
+
+        conn = self._conn()
+        with conn:
+            conn.executemany(f"INSERT OR REPLACE INTO {table} VALUES (?, ?, ?, ?, ?, ?, ?)", values)
+            # Only final responses to plain equality requests can be replayed from the table later
+            if replayable and all(str(k).isidentifier() for k in params or {}):
+                conn.execute("INSERT OR IGNORE INTO requests VALUES (?, ?)", (endpoint, self._params_key(params)))
+        self.writes += 1
+
+    def load(self, endpoint: str, params: Optional[Dict]) -> Optional[List[Dict]]:
+        """Answer a request from the warehouse, or None if it was never stored"""
+        if not self.accepts(endpoint):
+            return None
+        conn = self._conn()
+        stored = conn.execute("SELECT 1 FROM requests WHERE endpoint = ? AND params = ?",
+                              (endpoint, self._params_key(params))).fetchone()
+        if not stored:
+            return None
+
+        clauses, args = [], []
+        for key, value in (params or {}).items():
+            # Only plain equality requests are registered, so every param is a field
+            if key in INDEXED_COLUMNS:
+                clauses.append(f"{key} = ?")
+            else:
+                clauses.append(f"json_extract(data, '$.{key}') = ?")
+            args.append(int(value) if isinstance(value, str) and value.isdigit() else value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+
+        rows = conn.execute(f"SELECT data FROM {self._table(endpoint)} {where} ORDER BY rowid", args)
+        self.reads += 1
+        return [json.loads(data) for (data,) in rows]
+
+    def season_rows(self, endpoint: str, year: int) -> List[Dict]:
+        """Every stored row of an endpoint from sessions held in a given year"""
+        table = self._table(endpoint)
+        rows = self._conn().execute(
+            f"""
+            SELECT e.data FROM {table} e
+            JOIN {self._table('sessions')} s ON s.session_key = e.session_key
+            WHERE json_extract(s.data, '$.year') = ?
+            ORDER BY e.rowid
+            """,
+            (year,)
+        )
+        self.reads += 1
+        return [json.loads(data) for (data,) in rows]
+
+    def fastest_laps(self, driver_number: int, year: Optional[int] = None, limit: int = 10) -> List[Dict]:
+        """A driver's fastest stored laps across sessions, optionally within one year"""
+        query = f"SELECT l.data FROM {self._table('laps')} l"
+        args = []
+        if year is not None:
+            query += f" JOIN {self._table('sessions')} s ON s.session_key = l.session_key"
+        query += " WHERE l.driver_number = ? AND json_extract(l.data, '$.lap_duration') > 0"
+        args.append(driver_number)
+        if year is not None:
+            query += " AND json_extract(s.data, '$.year') = ?"
+            args.append(year)
+        query += " ORDER BY json_extract(l.data, '$.lap_duration') LIMIT ?"
+        args.append(max(limit, 0))
+        self.reads += 1
+        return [json.loads(data) for (data,) in self._conn().execute(query, args)]
+
+    def stats(self) -> Dict:
+        return {'path': self.path, 'tables': sorted(self._tables), 'reads': self.reads, 'writes': self.writes}
@@ -0,0 +1,208 @@
+"""WebSocket fan-out hub for live session updates.
+
+Runs beside the Flask app (`python ws_hub.py`) with its own OpenF1Client and
+LivePoller. Clients send {"action": "subscribe", "topic": "..."} where a topic
+is `<section>:<session_key>` or `<section>:<session_key>:<driver_number>`,
+for example `intervals:9158` or `all_laps:9158:1`.
+"""
+import argparse
+import asyncio
+import json
+import os
+from typing import Dict, List, Optional, Set, Tuple
+
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+from data_fetcher import OpenF1Client
+from poller import LivePoller
+
+
+class Subscriber:
+    def __init__(self, websocket, max_queue: int):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.topics: Set[str] = set()
+        # Topics whose subscription holds a LivePoller.watch() on the session
+        self.watching: Set[str] = set()
+
+    def offer(self, message: str) -> bool:
+        """Queue a message without blocking; False means the client has fallen too far behind"""
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+
+class FanoutHub:
+    """Serializes each update once per topic and queues it to every subscriber"""
+
+    # Messages a client may lag behind before it is disconnected
+    MAX_QUEUE = 256
+
+    def __init__(self, poller: LivePoller, max_queue: int = MAX_QUEUE):
+        self.poller = poller
+        self.max_queue = max_queue
+        self.topics: Dict[str, Set[Subscriber]] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.published = 0
+        self.delivered = 0
+        self.slow_disconnects = 0
+
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self.poller.add_listener(self._on_poller_update)
+
+    def _on_poller_update(self, session_key: int, section: str, rows: List[Dict]) -> None:
+        # Called from the poller thread - hand over to the event loop
+        self.loop.call_soon_threadsafe(self.publish, session_key, section, rows)
+
+    @staticmethod
+    def parse_topic(topic: str) -> Optional[Tuple[str, int, Optional[int]]]:
+        parts = str(topic).split(':')
+        if len(parts) not in (2, 3) or parts[0] not in LivePoller.STREAMED_SECTIONS:
+            return None
+        try:
+            numbers = [int(part) for part in parts[1:]]
+        except ValueError:
+            return None
+        return parts[0], numbers[0], numbers[1] if len(numbers) > 1 else None
+
+    @staticmethod
+    def _rows_for(rows: List[Dict], driver_number: Optional[int]) -> List[Dict]:
+        if driver_number is None:
+            return rows
+        return [row for row in rows if row.get('driver_number') == driver_number]
+
+    def publish(self, session_key: int, section: str, rows: List[Dict]) -> None:
+        """Broadcast new rows to the session topic and each affected driver topic"""
+        self._broadcast(f"{section}:{session_key}", 'update', rows)
+
+        by_driver = {}
+        for row in rows:
+            by_driver.setdefault(row.get('driver_number'), []).append(row)
+        for driver_number, driver_rows in by_driver.items():
+            if driver_number is not None:
+                self._broadcast(f"{section}:{session_key}:{driver_number}", 'update', driver_rows)
+
+    def _broadcast(self, topic: str, kind: str, rows: List[Dict]) -> None:
+        subscribers = self.topics.get(topic)
+        if not subscribers:
+            return
+
+        message = json.dumps({'type': kind, 'topic': topic, 'rows': rows})
+        self.published += 1
+        for subscriber in list(subscribers):
+            if subscriber.offer(message):
+                self.delivered += 1
+            else:
+                self._disconnect_slow(subscriber)
+
+    def _disconnect_slow(self, subscriber: Subscriber) -> None:
+        self.slow_disconnects += 1
+        self._unsubscribe_all(subscriber)
+        asyncio.ensure_future(subscriber.websocket.close(code=1013, reason='Client too slow'))
+
+    def _unsubscribe_all(self, subscriber: Subscriber) -> None:
+        for topic in list(subscriber.topics):
+            self._unsubscribe(subscriber, topic)
+
+    async def _subscribe(self, subscriber: Subscriber, topic: str) -> Optional[str]:
+        parsed = self.parse_topic(topic)
+        if not parsed:
+            return f"Unknown topic {topic}"
+        section, session_key, driver_number = parsed
+
+        # watch() may hit the network to check whether the session is live
+        if topic not in subscriber.watching:
+            log = await asyncio.get_running_loop().run_in_executor(None, self.poller.watch, session_key)
+            if log is not None:
+                subscriber.watching.add(topic)
+
+        self.topics.setdefault(topic, set()).add(subscriber)
+        subscriber.topics.add(topic)
+
+        current = self.poller.get(session_key, section)
+        if current:
+            message = json.dumps({'type': 'snapshot', 'topic': topic, 'rows': self._rows_for(current, driver_number)})
+            if not subscriber.offer(message):
+                self._disconnect_slow(subscriber)
+        return None
+
+    def _unsubscribe(self, subscriber: Subscriber, topic: str) -> None:
+        subscriber.topics.discard(topic)
+        subscribers = self.topics.get(topic)
+        if subscribers:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self.topics[topic]
+        if topic in subscriber.watching:
+            subscriber.watching.discard(topic)
+            self.poller.unwatch(self.parse_topic(topic)[1])
+
+    async def _send_loop(self, subscriber: Subscriber) -> None:
+        while True:
+            message = await subscriber.queue.get()
+            await subscriber.websocket.send(message)
+
+    async def handler(self, websocket) -> None:
+        subscriber = Subscriber(websocket, self.max_queue)
+        sender = asyncio.create_task(self._send_loop(subscriber))
+        try:
+            async for raw in websocket:
+                try:
+                    request = json.loads(raw)
+                    action, topic = request.get('action'), request.get('topic')
+                except (ValueError, AttributeError):
+                    action, topic = None, None
+
+                error = None
+                if action == 'subscribe':
+                    error = await self._subscribe(subscriber, topic)
+                elif action == 'unsubscribe':
+                    self._unsubscribe(subscriber, topic)
+                else:
+                    error = 'Expected {"action": "subscribe" | "unsubscribe", "topic": "..."}'
+
+                if error and not subscriber.offer(json.dumps({'type': 'error', 'error': error})):
+                    self._disconnect_slow(subscriber)
+        except ConnectionClosed:
+            pass
+        finally:
+            self._unsubscribe_all(subscriber)
+            sender.cancel()
+
+    def stats(self) -> Dict:
+        return {
+            'topics': {topic: len(subscribers) for topic, subscribers in self.topics.items()},
+            'published': self.published,
+            'delivered': self.delivered,
+            'slow_disconnects': self.slow_disconnects
+        }
+
+
+async def run_hub(host: str, port: int, max_queue: int) -> None:
+    client = OpenF1Client(archive_dir=os.environ.get('PITWALL_ARCHIVE_DIR', 'archive'))
+    poller = LivePoller(client)
+    hub = FanoutHub(poller, max_queue=max_queue)
+    hub.attach(asyncio.get_running_loop())
+    poller.start()
+
+    async with serve(hub.handler, host, port, max_queue=16):
+        print(f"WebSocket hub listening on ws://{host}:{port}")
+        await asyncio.Future()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pitwall WebSocket fan-out hub')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5002)
+    parser.add_argument('--max-queue', type=int, default=FanoutHub.MAX_QUEUE,
+                        help='Messages a slow client may lag behind before it is disconnected')
+    args = parser.parse_args()
+    asyncio.run(run_hub(args.host, args.port, args.max_queue))
+
+
+if __name__ == '__main__':
+    main()